@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Cache.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Persistent metadata cache for Crossref and PubMed lookups"""
+
+import json
+import sqlite3
+import threading
+import time
+
+from DOI import canonical_doi
+from Metrics import metrics
+
+DEFAULT_TTL = 60 * 60 * 24 * 30
+DEFAULT_MAX_ENTRIES = 100000
+DEFAULT_ACCESS_BATCH = 100
+
+def cache_key(doi):
+    return canonical_doi(doi) or doi.strip().lower()
+
+class MetadataCache:
+    """SQLite store of raw Crossref queries and PubMed enrichment, keyed by canonical DOI.
+
+    Entries older than ttl seconds are treated as missing. Once the store holds more than
+    max_entries works, the least recently used are evicted; access times are written access_batch
+    at a time (and before evicting, or on flush()), and the works are counted once on opening. In cache_only mode callers are
+    expected to never go to the network and treat a miss as a failed lookup. DOI aliases and
+    title fingerprints (see Titles.py) are kept alongside; of those, only bibliographic searches
+    expire, and fingerprints go with the work they were read from.
+    """
+    def __init__(self, path, ttl = DEFAULT_TTL, max_entries = DEFAULT_MAX_ENTRIES, cache_only = False,
+                 access_batch = DEFAULT_ACCESS_BATCH):
+        self._path = path
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._cache_only = cache_only
+        self._access_batch = access_batch
+        self._accessed = dict()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS works (
+                    doi TEXT PRIMARY KEY,
+                    crossref TEXT,
+                    crossref_fetched REAL,
+                    pubmed TEXT,
+                    pubmed_fetched REAL,
+                    accessed REAL NOT NULL
+                )""")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS works_accessed ON works (accessed)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, doi TEXT NOT NULL)")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS titles (
+                    fingerprint TEXT NOT NULL,
+                    doi TEXT NOT NULL,
+                    author TEXT,
+                    year INTEGER,
+                    source TEXT,
+                    PRIMARY KEY (fingerprint, doi)
+                )""")
+            #Caches from before fingerprints had a source; they are rebuilt as their works are read again
+            if 'source' not in [column[1] for column in self._connection.execute("PRAGMA table_info(titles)")]:
+                self._connection.execute("DELETE FROM titles")
+                self._connection.execute("ALTER TABLE titles ADD COLUMN source TEXT")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS titles_source ON titles (source)")
+            #Bibliographic searches, including those that found nothing (doi is NULL)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS title_lookups (query TEXT PRIMARY KEY, doi TEXT, fetched REAL NOT NULL)")
+            self._connection.commit()
+            self._count = self._connection.execute("SELECT COUNT(*) FROM works").fetchone()[0]
+
+    def is_cache_only(self):
+        return self._cache_only
+
+    def _is_fresh(self, fetched):
+        if fetched is None:
+            return False
+        if self._ttl is None:
+            return True
+        return time.time() - fetched < self._ttl
+
+    def _get(self, doi, column):
+        key = cache_key(doi)
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {column}, {column}_fetched FROM works WHERE doi = ?", (key,)).fetchone()
+            if not row or row[0] is None:
+                return None
+            #Offline runs never refetch, so stale entries are still better than nothing
+            if not self._cache_only and not self._is_fresh(row[1]):
+                return None
+            self._accessed[key] = time.time()
+            if len(self._accessed) >= self._access_batch:
+                self._write_accessed()
+                self._connection.commit()
+        return json.loads(row[0])
+
+    def _write_accessed(self):
+        """Writes the pending access times; call with the lock held"""
+        if self._accessed:
+            self._connection.executemany("UPDATE works SET accessed = ? WHERE doi = ?",
+                                         [(accessed, key) for key, accessed in self._accessed.items()])
+            self._accessed.clear()
+
+    def flush(self):
+        with self._lock:
+            self._write_accessed()
+            self._connection.commit()
+
+    def _put(self, doi, column, value):
+        key = cache_key(doi)
+        now = time.time()
+        with self._lock:
+            self._accessed.pop(key, None)
+            if not self._connection.execute("SELECT 1 FROM works WHERE doi = ?", (key,)).fetchone():
+                self._count += 1
+            self._connection.execute(
+                f"""INSERT INTO works (doi, {column}, {column}_fetched, accessed) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(doi) DO UPDATE SET {column} = excluded.{column},
+                    {column}_fetched = excluded.{column}_fetched, accessed = excluded.accessed""",
+                (key, json.dumps(value), now, now))
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self):
+        if not self._max_entries:
+            return
+        excess = self._count - self._max_entries
+        if excess > 0:
+            self._write_accessed()
+            evicted = "SELECT doi FROM works ORDER BY accessed ASC LIMIT ?"
+            self._connection.execute(f"DELETE FROM titles WHERE source IN ({evicted})", (excess,))
+            self._count -= self._connection.execute(f"DELETE FROM works WHERE doi IN ({evicted})", (excess,)).rowcount
+
+    def _counted(self, column, value):
+        metrics.count(f"cache.{column}.{'miss' if value is None else 'hit'}")
+        return value
+
+    def get_crossref(self, doi):
+        return self._counted('crossref', self._get(doi, 'crossref'))
+
+    def put_crossref(self, doi, query):
+        self._put(doi, 'crossref', query)
+
+    def get_pubmed(self, doi):
+        return self._counted('pubmed', self._get(doi, 'pubmed'))
+
+    def put_pubmed(self, doi, enrichment):
+        self._put(doi, 'pubmed', enrichment)
+
+    def get_alias(self, alias):
+        with self._lock:
+            row = self._connection.execute("SELECT doi FROM aliases WHERE alias = ?", (cache_key(alias),)).fetchone()
+        return row[0] if row else None
+
+    def put_alias(self, alias, doi):
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO aliases (alias, doi) VALUES (?, ?)",
+                                     (cache_key(alias), cache_key(doi)))
+            self._connection.commit()
+
+    def get_titles(self, fingerprint):
+        """(doi, author, year) of every work stored under a title fingerprint"""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT doi, author, year FROM titles WHERE fingerprint = ?", (fingerprint,)).fetchall()
+
+    def put_titles(self, rows, source = None):
+        """Stores (fingerprint, doi, author, year) rows read from the work source (by default, each row's
+        own work), keeping those already there"""
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO titles (fingerprint, doi, author, year, source) VALUES (?, ?, ?, ?, ?)",
+                [(fingerprint, cache_key(doi), author, year, cache_key(source or doi))
+                 for fingerprint, doi, author, year in rows])
+            self._connection.commit()
+
+    def get_title_lookup(self, query):
+        """(True, DOI or None) for a fresh earlier search, (False, None) if there is none"""
+        with self._lock:
+            row = self._connection.execute("SELECT doi, fetched FROM title_lookups WHERE query = ?", (query,)).fetchone()
+        if not row or (not self._cache_only and not self._is_fresh(row[1])):
+            return False, None
+        return True, row[0]
+
+    def put_title_lookup(self, query, doi):
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO title_lookups (query, doi, fetched) VALUES (?, ?, ?)",
+                                     (query, cache_key(doi) if doi else None, time.time()))
+            self._connection.commit()
+
+    def purge_expired(self):
+        if self._ttl is None:
+            return
+        cutoff = time.time() - self._ttl
+        expired = """SELECT doi FROM works WHERE (crossref_fetched IS NULL OR crossref_fetched < ?)
+                     AND (pubmed_fetched IS NULL OR pubmed_fetched < ?)"""
+        with self._lock:
+            self._connection.execute(f"DELETE FROM titles WHERE source IN ({expired})", (cutoff, cutoff))
+            self._count -= self._connection.execute(f"DELETE FROM works WHERE doi IN ({expired})",
+                                                    (cutoff, cutoff)).rowcount
+            self._connection.execute("DELETE FROM title_lookups WHERE fetched < ?", (cutoff,))
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._write_accessed()
+            self._connection.commit()
+            self._connection.close()
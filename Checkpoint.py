@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Checkpoint.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Atomic checkpoints of surfing state"""
+
+import gzip
+import os
+import pickle
+import tempfile
+
+class Checkpointer:
+    """Saves walk state as a gzipped pickle, atomically, so a crash mid-write never leaves a broken file.
+
+    key identifies the run (corpus, walkers, seed...); a checkpoint saved under a different key
+    is ignored on load rather than resumed into the wrong run.
+    """
+    def __init__(self, path, key = None, every = 50):
+        self._path = path
+        self._key = key
+        self._every = every
+
+    def get_every(self):
+        return self._every
+
+    def save(self, state):
+        directory = os.path.dirname(os.path.abspath(self._path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.checkpoint-')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as file:
+                pickle.dump({'key': self._key, 'state': state}, file, protocol=pickle.HIGHEST_PROTOCOL)
+                file.flush()
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        print(f"Checkpoint saved to {self._path}")
+
+    def load(self):
+        if not os.path.exists(self._path):
+            return None
+        try:
+            with gzip.open(self._path, 'rb') as file:
+                checkpoint = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            print(f"Unreadable checkpoint {self._path}, starting afresh")
+            return None
+        if checkpoint.get('key') != self._key:
+            print(f"Checkpoint {self._path} is from a different run, starting afresh")
+            return None
+        return checkpoint['state']
+
+    def remove(self):
+        if os.path.exists(self._path):
+            os.remove(self._path)
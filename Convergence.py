@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Convergence.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Online stopping rule for the walk, based on ranking stability"""
+
+import time
+
+def top_k(paper_counter, k):
+    """DOIs of the k most visited papers, ties broken by DOI so the order is deterministic"""
+    ranked = sorted(paper_counter.items(), key=lambda item: (-item[1], item[0].get_DOI()))
+    return [paper.get_DOI() for paper, _ in ranked[:k]]
+
+def top_k_overlap(previous, current):
+    """Fraction of the (larger) top-k list shared by both"""
+    size = max(len(previous), len(current))
+    if not size:
+        return 0.0
+    return len(set(previous) & set(current)) / size
+
+class ConvergenceMonitor:
+    """Decides when a walk has converged, checked every `every` steps per walker.
+
+    Between consecutive checks it compares the top_k most visited papers (their overlap must
+    be at least overlap) and the rate of discovery (new distinct papers per step must be at
+    most discovery). Both must hold for patience checks in a row. max_seconds is an optional
+    time budget; the step budget is whatever the caller asked the pool to walk.
+    """
+    def __init__(self, every = 25, top_k = 20, overlap = 0.9, discovery = 0.1, patience = 3, max_seconds = None):
+        self._every = every
+        self._top_k = top_k
+        self._overlap = overlap
+        self._discovery = discovery
+        self._patience = patience
+        self._max_seconds = max_seconds
+        self._started = None
+        self._previous_top = None
+        self._previous_seen = 0
+        self._previous_steps = 0
+        self._stable = 0
+        self._history = []
+
+    def get_every(self):
+        return self._every
+
+    def start(self):
+        """Starts the time budget; otherwise it starts at the first check"""
+        self._started = time.monotonic()
+
+    def get_history(self):
+        return self._history
+
+    def check(self, paper_counter, steps):
+        """Records one window given the merged counts after `steps` total steps.
+
+        Returns why the walk should stop ('converged' or 'time budget'), or None to continue.
+        """
+        now = time.monotonic()
+        if self._started is None:
+            self._started = now
+        current_top = top_k(paper_counter, self._top_k)
+        window = steps - self._previous_steps
+        if self._previous_top is not None and window > 0:
+            overlap = top_k_overlap(self._previous_top, current_top)
+            discovery = (len(paper_counter) - self._previous_seen) / window
+            stable = overlap >= self._overlap and discovery <= self._discovery
+            self._stable = self._stable + 1 if stable else 0
+            self._history.append({'steps': steps, 'overlap': overlap, 'discovery': discovery})
+            print(f"Convergence after {steps} steps: top-{self._top_k} overlap {overlap:.2f}, "
+                  f"discovery {discovery:.3f} new papers/step ({self._stable}/{self._patience} stable)")
+        self._previous_top = current_top
+        self._previous_seen = len(paper_counter)
+        self._previous_steps = steps
+        if self._stable >= self._patience:
+            return 'converged'
+        if self._max_seconds is not None and now - self._started >= self._max_seconds:
+            return 'time budget'
+        return None
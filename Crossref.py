@@ -0,0 +1,17 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Crossref.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Fields read from Crossref work messages, shared by the live fetch path and the snapshot import"""
+
+def publication_year(message):
+    """Year of print publication, else online publication, else issue; None if Crossref lists none"""
+    for field in ('published-print', 'published-online', 'issued'):
+        date_parts = (message.get(field) or {}).get('date-parts')
+        if date_parts and date_parts[0] and date_parts[0][0]:
+            return date_parts[0][0]
+    return None
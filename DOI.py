@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	DOI.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""DOI canonicalization and alias index"""
+
+import re
+import threading
+from urllib.parse import unquote
+
+DOI_PATTERN = re.compile(r'10\.\d{4,9}/\S+')
+
+def canonical_doi(doi):
+    """Bare lower-case DOI from any of the usual spellings, e.g. https://dx.doi.org/10.1016/X or doi:10.1016/x.
+
+    DOIs are case-insensitive, so lower case is canonical. Returns None if doi is empty or
+    does not contain anything that looks like a DOI.
+    """
+    if not doi:
+        return None
+    doi = unquote(doi.strip())
+    match = DOI_PATTERN.search(doi)
+    if not match:
+        return None
+    return match.group(0).rstrip('.').lower()
+
+class DOIAliasIndex:
+    """Maps every DOI spelling seen so far to the DOI that Crossref reports for the work.
+
+    Spelling differences are removed by canonical_doi; the index additionally records true
+    aliases, where a requested DOI resolves to a work with a different DOI. With a cache,
+    aliases are persisted so they are known on later runs too, and up to max_unaliased DOIs
+    the cache has no alias for are remembered so it is asked only once about each (the set is
+    started afresh when full).
+    """
+    def __init__(self, cache = None, max_unaliased = 1000000):
+        self._aliases = dict()
+        self._unaliased = set()
+        self._max_unaliased = max_unaliased
+        self._cache = cache
+        self._lock = threading.Lock()
+
+    def add(self, alias, doi):
+        alias = canonical_doi(alias)
+        doi = canonical_doi(doi)
+        if not alias or not doi or alias == doi:
+            return
+        with self._lock:
+            self._aliases[alias] = doi
+            self._unaliased.discard(alias)
+        if self._cache:
+            self._cache.put_alias(alias, doi)
+
+    def resolve(self, doi):
+        doi = canonical_doi(doi)
+        if not doi:
+            return None
+        target = self._aliases.get(doi)
+        if target is None and self._cache and doi not in self._unaliased:
+            target = self._cache.get_alias(doi)
+            with self._lock:
+                if target:
+                    self._aliases[doi] = target
+                else:
+                    if len(self._unaliased) >= self._max_unaliased:
+                        self._unaliased.clear()
+                    self._unaliased.add(doi)
+        return target or doi
+
+    def __len__(self):
+        return len(self._aliases)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Decisions.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Per-DOI record of fetch and scoring outcomes"""
+
+import threading
+import time
+
+ACCEPTED = 'accepted'
+LOW_SCORE = 'low_score'
+FAILED = 'failed'
+
+class Decision:
+    def __init__(self, outcome, paper = None, scores = None, expires = None, failures = 0):
+        self._outcome = outcome
+        self._paper = paper
+        self._scores = scores
+        self._expires = expires
+        self._failures = failures
+
+    def get_outcome(self):
+        return self._outcome
+
+    def get_paper(self):
+        return self._paper
+
+    def get_scores(self):
+        """(total, title, author) scores"""
+        return self._scores
+
+    def get_failures(self):
+        return self._failures
+
+    def is_accepted(self):
+        return self._outcome == ACCEPTED
+
+    def is_low_score(self):
+        return self._outcome == LOW_SCORE
+
+    def is_failed(self):
+        return self._outcome == FAILED
+
+    def is_expired(self, now):
+        return self._expires is not None and now >= self._expires
+
+class DecisionCache:
+    """Remembers, for each DOI, whether it was accepted, rejected for a low score or failed to fetch.
+
+    Scored outcomes last for the whole run, so a paper is fetched and scored at most once, and so
+    do permanent failures (no such work). Other failed fetches are negatively cached for failure_ttl
+    seconds, doubling with each repeated failure up to max_failure_ttl, after which the DOI may be
+    tried again. With max_decisions, only that many
+    of the most recently made decisions are kept.
+    """
+    def __init__(self, failure_ttl = 300, max_failure_ttl = 3600, max_decisions = None):
+        self._decisions = dict()
+        self._failure_ttl = failure_ttl
+        self._max_failure_ttl = max_failure_ttl
+        self._max_decisions = max_decisions
+        self._lock = threading.Lock()
+
+    def _keep(self, doi, decision):
+        """Stores decision as the most recent one; call with the lock held"""
+        self._decisions.pop(doi, None)
+        self._decisions[doi] = decision
+        if self._max_decisions is not None:
+            while len(self._decisions) > self._max_decisions:
+                del self._decisions[next(iter(self._decisions))]
+
+    def get(self, doi):
+        decision = self._decisions.get(doi)
+        if decision and decision.is_expired(time.time()):
+            return None
+        return decision
+
+    def record(self, doi, paper, scores, accepted):
+        decision = Decision(ACCEPTED if accepted else LOW_SCORE, paper, scores)
+        with self._lock:
+            self._keep(doi, decision)
+        return decision
+
+    def fail(self, doi, permanent = False):
+        with self._lock:
+            previous = self._decisions.get(doi)
+            failures = previous.get_failures() + 1 if previous and previous.is_failed() else 1
+            expires = None
+            if not permanent:
+                expires = time.time() + min(self._failure_ttl * 2 ** (failures - 1), self._max_failure_ttl)
+            decision = Decision(FAILED, expires=expires, failures=failures)
+            self._keep(doi, decision)
+        return decision
+
+    def forget(self, doi):
+        with self._lock:
+            self._decisions.pop(doi, None)
+
+    def items(self):
+        return list(self._decisions.items())
+
+    def update(self, items):
+        with self._lock:
+            for doi, decision in items:
+                self._keep(doi, decision)
+
+    def count(self, outcome):
+        return sum(1 for decision in list(self._decisions.values()) if decision.get_outcome() == outcome)
+
+    def __len__(self):
+        return len(self._decisions)
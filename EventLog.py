@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	EventLog.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Streaming log of surf steps and incremental output.csv"""
+
+import csv
+import json
+import os
+import tempfile
+import threading
+import time
+
+def write_output(path, ranking):
+    """Writes a Paper -> times_seen ranking to path, replacing the old file atomically"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.output-', suffix='.csv')
+    try:
+        with os.fdopen(fd, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile, delimiter=",")
+            writer.writerow(['DOI', 'author', 'title', 'times_seen'])
+            for paper,times_seen in ranking.items():
+                writer.writerow([paper.get_DOI(),
+                                 paper.get_title(),
+                                 paper.get_first_author(),
+                                 times_seen])
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def make_event(walker, step, source, wrapped_paper, depth):
+    """JSON-ready record of one surf() step"""
+    target = wrapped_paper.get_paper()
+    candidate = wrapped_paper.get_candidate()
+    return {'time': time.time(),
+            'walker': walker,
+            'step': step,
+            'source': source.get_DOI(),
+            'target': target.get_DOI(),
+            'action': type(wrapped_paper.get_action()).__name__,
+            'score': wrapped_paper.get_score(),
+            'candidate': candidate.get_DOI() if candidate else None,
+            'depth': depth}
+
+class SurfEventLog:
+    """Writes one JSON record per surf() step to a JSONL file and keeps output.csv up to date.
+
+    Only running visit counts are held in memory; the step history lives in the file, which is
+    flushed (and the ranking rewritten to output_path) every flush_every records. The file is
+    opened on first use and replaced, unless resume() was called first to continue its events.
+    """
+    def __init__(self, path, output_path = None, flush_every = 100):
+        self._path = path
+        self._file = None
+        self._append = False
+        self._output_path = output_path
+        self._flush_every = flush_every
+        self._counts = dict()
+        self._records = 0
+        self._lock = threading.Lock()
+
+    def resume(self, paper_counter):
+        """Continues a run resumed from a checkpoint: keeps its events and starts the ranking from its counts"""
+        with self._lock:
+            self._append = True
+            self._counts = dict(paper_counter)
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self._path, 'a' if self._append else 'w', encoding='utf-8')
+        return self._file
+
+    def record(self, walker, step, source, wrapped_paper, depth, counted):
+        target = wrapped_paper.get_paper()
+        line = json.dumps(make_event(walker, step, source, wrapped_paper, depth)) + '\n'
+        with self._lock:
+            self._open().write(line)
+            if counted:
+                self._counts[target] = self._counts.get(target, 0) + 1
+            self._records += 1
+            if self._records % self._flush_every == 0:
+                self._flush()
+
+    def _flush(self):
+        self._open().flush()
+        if self._output_path:
+            ranking = dict(sorted(self._counts.items(), key=lambda item: item[1], reverse=True))
+            write_output(self._output_path, ranking)
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._file.close()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Graph.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Citation graph built up step by step during the walk"""
+
+DEFAULT_COLOUR = '#ADACAC'
+MIXED_COLOUR = '#D8C292'
+
+class CitationGraph:
+    """Nodes are paper names (Paper.make_name()) with visit counts, depths and antibiotic colours;
+    an edge (paper, parent) counts the moves from parent to paper. Every update is a couple of
+    dict operations, so recording a step costs the same however long the walk has been.
+
+    Depth is the shortest number of moves from a starting paper (None if only reached by jumps).
+    """
+    def __init__(self):
+        self._nodes = dict()
+        self._edges = dict()
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, name):
+        return name in self._nodes
+
+    def _node(self, name):
+        node = self._nodes.get(name)
+        if node is None:
+            node = self._nodes[name] = {'visits': 0, 'depth': None, 'colours': set(), 'start': False}
+        return node
+
+    def add_node(self, name, colours = (), start = False):
+        node = self._node(name)
+        node['colours'].update(colours)
+        if start:
+            node['start'] = True
+            node['depth'] = 0
+        return node
+
+    def add_visits(self, name, n = 1):
+        self._node(name)['visits'] += n
+
+    def set_depth(self, name, depth):
+        node = self._node(name)
+        if depth is not None and (node['depth'] is None or depth < node['depth']):
+            node['depth'] = depth
+
+    def add_edge(self, name, parent, n = 1):
+        key = (name, parent)
+        self._edges[key] = self._edges.get(key, 0) + n
+        parent_depth = self._node(parent)['depth']
+        if parent_depth is not None:
+            self.set_depth(name, parent_depth + 1)
+
+    def visit(self, name, parent = None, counted = True, colours = ()):
+        """Records one walker step arriving at name, from parent unless the walker jumped, and returns its depth"""
+        node = self.add_node(name, colours)
+        if counted:
+            node['visits'] += 1
+        if parent is not None:
+            self.add_edge(name, parent)
+        return node['depth']
+
+    def get_depth(self, name):
+        node = self._nodes.get(name)
+        return node['depth'] if node else None
+
+    def get_visits(self, name):
+        node = self._nodes.get(name)
+        return node['visits'] if node else 0
+
+    def get_colour(self, name):
+        colours = self._nodes[name]['colours']
+        if not colours:
+            return DEFAULT_COLOUR
+        if len(colours) == 1:
+            return next(iter(colours))
+        return MIXED_COLOUR
+
+    def is_start(self, name):
+        node = self._nodes.get(name)
+        return bool(node and node['start'])
+
+    def nodes(self):
+        return list(self._nodes)
+
+    def edges(self):
+        """(name, parent, multiplicity) for every distinct move"""
+        return [(name, parent, n) for (name, parent), n in self._edges.items()]
+
+    def merge(self, other):
+        for name, node in other._nodes.items():
+            own = self._node(name)
+            own['visits'] += node['visits']
+            own['colours'].update(node['colours'])
+            own['start'] = own['start'] or node['start']
+            self.set_depth(name, node['depth'])
+        for key, n in other._edges.items():
+            self._edges[key] = self._edges.get(key, 0) + n
+        return self
+
+    def to_networkx(self):
+        """DiGraph with the attributes Render.py draws from (size, node_size, color, alpha,
+        line_width, start) plus visits and depth on nodes and multiplicity on edges"""
+        import networkx as nx
+        graph = nx.DiGraph()
+        for name, node in self._nodes.items():
+            #Starting papers count as one visit; deeper papers are drawn larger
+            size = max(node['visits'], 1) + 3 * (node['depth'] or 0)
+            start = node['start']
+            graph.add_node(name, visits=node['visits'], depth=node['depth'], size=size, node_size=20 * size,
+                           color=self.get_colour(name), alpha=0.7 if start else 0.9,
+                           line_width=7 if start else 2, start=start)
+        graph.add_edges_from((name, parent, {'multiplicity': n}) for (name, parent), n in self._edges.items())
+        return graph
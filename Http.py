@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Http.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Shared HTTP layer for Crossref and NCBI: per-host rate limits, retries and a circuit breaker"""
+
+from email.utils import parsedate_to_datetime
+from random import Random
+from urllib.parse import urlsplit
+import threading
+import time
+
+import requests
+import requests.adapters
+
+from Metrics import metrics
+
+USER_AGENT = 'ReferenceSurfer (https://github.com/agerada/ReferenceSurfer)'
+
+#Worth retrying: timeouts, throttling and server-side failures; anything else is the answer
+TRANSIENT_STATUSES = frozenset((408, 425, 429, 500, 502, 503, 504))
+
+class HttpError(Exception):
+    def __init__(self, message, status = None):
+        super().__init__(message)
+        self.status = status
+
+class PermanentError(HttpError):
+    """The service answered and retrying will not change it, e.g. 400 or 404"""
+
+class TransientError(HttpError):
+    """Still failing after every retry; says nothing about the resource itself"""
+
+class CircuitOpenError(TransientError):
+    """The service has been failing for longer than the caller is willing to pause"""
+
+class BusyError(TransientError):
+    """A speculative request was dropped because the host had no capacity to spare for it"""
+
+class TokenBucket:
+    """Allows rate requests per second on average, with bursts of up to burst"""
+    def __init__(self, rate, burst = 1):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Takes a token, going into debt if there is none, and returns how long to wait before using it"""
+        if not self._rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self._rate)
+
+    def available(self):
+        """Whether a whole token is there to take now, without taking it"""
+        if not self._rate:
+            return True
+        with self._lock:
+            return self._tokens + (time.monotonic() - self._updated) * self._rate >= 1
+
+    def try_take(self):
+        """Takes a token only if one is available now, without going into debt"""
+        if not self._rate:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive transient failures so that nobody calls the service
+    for reset_timeout seconds. Then a single probe is let through: success closes the breaker,
+    failure opens it again for twice as long, up to max_reset_timeout.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold = 5, reset_timeout = 10, max_reset_timeout = 120, name = None):
+        self._failure_threshold = failure_threshold
+        self._base_timeout = reset_timeout
+        self._reset_timeout = reset_timeout
+        self._max_reset_timeout = max_reset_timeout
+        self._name = name
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_state(self):
+        return self._state
+
+    def wait_time(self):
+        """Seconds until a request may be sent, 0 if it may go now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return 0.0
+            now = time.monotonic()
+            if self._state == self.OPEN:
+                remaining = self._opened_at + self._reset_timeout - now
+                if remaining > 0:
+                    return remaining
+                #This caller is the probe; everyone else waits for its outcome
+                self._state = self.HALF_OPEN
+                self._opened_at = now
+                return 0.0
+            #A probe that never reported back (e.g. the caller died) does not block forever
+            if now - self._opened_at >= self._reset_timeout:
+                self._opened_at = now
+                return 0.0
+            return min(1.0, self._reset_timeout)
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                print(f"Circuit closed for {self._name}")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._reset_timeout = self._base_timeout
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN:
+                self._reset_timeout = min(self._reset_timeout * 2, self._max_reset_timeout)
+            elif self._state == self.OPEN or self._failures < self._failure_threshold:
+                return
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+        metrics.count(f"http.{self._name}.circuit_opened")
+        print(f"Circuit open for {self._name}: pausing requests for {self._reset_timeout:g}s")
+
+def retry_after_seconds(value):
+    """Retry-After header as seconds (it is either a number or an HTTP date), None if absent or unreadable"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class HostPolicy:
+    """Rate limit, retry schedule and circuit breaker shared by every caller of one host.
+
+    Retries back off exponentially from backoff seconds with full jitter, capped at max_backoff,
+    and never sooner than a Retry-After header asks. While the breaker is open, callers pause for
+    up to max_pause seconds in all before giving up with CircuitOpenError.
+
+    Speculative requests (prefetches) never take a token from anyone: they wait, for up to
+    speculative_wait seconds, until the rate limit has one to spare while the breaker is closed,
+    and within a separate budget of speculative_share of the rate. Requests somebody is waiting
+    for go into debt instead, so they always go first.
+    """
+    def __init__(self, name, rate = None, burst = 1, retries = 4, backoff = 0.5, max_backoff = 30,
+                 failure_threshold = 5, reset_timeout = 10, max_pause = 60, seed = None, speculative_share = 0.5,
+                 speculative_wait = 10):
+        self._name = name
+        self._bucket = TokenBucket(rate, burst)
+        self._speculative = TokenBucket(rate * speculative_share if rate else None)
+        self._speculative_wait = speculative_wait
+        self._poll = min(0.1, 1 / rate) if rate else 0.1
+        self._breaker = CircuitBreaker(failure_threshold, reset_timeout, name=name)
+        self._retries = retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._max_pause = max_pause
+        self._rng = Random(seed)
+        self._lock = threading.Lock()
+
+    def get_name(self):
+        return self._name
+
+    def get_retries(self):
+        return self._retries
+
+    def get_breaker(self):
+        return self._breaker
+
+    def pause_delay(self, paused):
+        """Seconds to pause for the breaker before the next request (0 to go now), having already
+        paused `paused` seconds; raises CircuitOpenError once that would exceed max_pause"""
+        wait = self._breaker.wait_time()
+        if wait and paused + wait > self._max_pause:
+            metrics.count(f"http.{self._name}.circuit_rejected")
+            raise CircuitOpenError(f"{self._name} unavailable, circuit open")
+        return wait
+
+    def rate_delay(self):
+        """Takes a rate limit token and returns how long to wait before using it"""
+        return self._bucket.reserve()
+
+    def spare_turn(self, needed = None):
+        """Waits for a token that no other request needs and takes it; False if none came in time,
+        None as soon as the needed event (if any) is set and the request should take its turn as usual"""
+        deadline = time.monotonic() + self._speculative_wait
+        while True:
+            if needed is not None and needed.is_set():
+                return None
+            #Never the half-open probe, and never while the breaker is pausing everyone
+            if (self._breaker.get_state() == CircuitBreaker.CLOSED and self._speculative.available()
+                    and self._bucket.try_take()):
+                #The speculative budget is only charged once the host has granted the token
+                self._speculative.reserve()
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(remaining, self._poll))
+
+    def retry_delay(self, attempt, retry_after = None):
+        """Delay before retry number attempt + 1, or None once retries are used up"""
+        if attempt >= self._retries:
+            return None
+        with self._lock:
+            delay = self._rng.uniform(0, min(self._max_backoff, self._backoff * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self._max_backoff))
+        return delay
+
+    def record(self, transient):
+        if transient:
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
+
+class HttpClient:
+    """GETs through a HostPolicy over one pooled keep-alive session.
+
+    get() returns the successful response, raises PermanentError for an answer that retrying
+    cannot change and TransientError once retries (or the breaker pause) are exhausted. With
+    speculative=True the request waits for spare capacity (see HostPolicy) and is not retried; it
+    raises BusyError when none came in time and TransientError on the first transient failure.
+    speculative may also be a threading.Event: once it is set, somebody is waiting for the answer
+    and the request stops waiting for spare capacity and takes its turn like any other.
+    """
+    def __init__(self, policy, timeout = 30, headers = None, pool_size = 32):
+        self._policy = policy
+        self._timeout = timeout
+        self._session = requests.Session()
+        #Walkers, prefetchers and the corpus resolver all share the session
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        if headers:
+            self._session.headers.update(headers)
+
+    def get_policy(self):
+        return self._policy
+
+    def _wait_turn(self):
+        paused = 0.0
+        with metrics.timer(f"wait.{self._policy.get_name()}"):
+            while True:
+                delay = self._policy.pause_delay(paused)
+                if not delay:
+                    break
+                time.sleep(delay)
+                paused += delay
+            delay = self._policy.rate_delay()
+            if delay:
+                time.sleep(delay)
+
+    def get(self, url, params = None, headers = None, speculative = False):
+        name = self._policy.get_name()
+        attempt = 0
+        while True:
+            if not speculative:
+                self._wait_turn()
+            else:
+                with metrics.timer(f"wait.{name}.speculative"):
+                    spare = self._policy.spare_turn(speculative if isinstance(speculative, threading.Event) else None)
+                if spare is None:
+                    metrics.count(f"http.{name}.speculative_needed")
+                    self._wait_turn()
+                elif not spare:
+                    metrics.count(f"http.{name}.speculative_dropped")
+                    raise BusyError(f"{name} had no spare capacity for {url}")
+            status, retry_after = None, None
+            try:
+                with metrics.timer(name):
+                    response = self._session.get(url, params=params, headers=headers, timeout=self._timeout)
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as error:
+                failure = type(error).__name__
+            else:
+                status = response.status_code
+                if status < 400:
+                    self._policy.record(transient=False)
+                    return response
+                if status not in TRANSIENT_STATUSES:
+                    self._policy.record(transient=False)
+                    raise PermanentError(f"{name} HTTP {status} for {url}", status)
+                failure = str(status)
+                retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+            metrics.count(f"http.{name}.error.{failure}")
+            self._policy.record(transient=True)
+            delay = None if speculative else self._policy.retry_delay(attempt, retry_after)
+            if delay is None:
+                raise TransientError(f"{name} {failure} for {url} after {attempt + 1} attempts", status)
+            metrics.count(f"http.{name}.retries")
+            time.sleep(delay)
+            attempt += 1
+
+#One client (and so one rate limit and breaker) per service and host, shared by every module
+_clients = dict()
+_clients_lock = threading.Lock()
+
+def get_client(url, name = None, rate = None, timeout = 30, headers = None, **policy):
+    """The shared client for url's host, created with these settings on first use"""
+    key = (urlsplit(url).netloc, name)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = HttpClient(HostPolicy(name or key[0], rate=rate, **policy),
+                                                timeout=timeout, headers=headers)
+        return client
+
+def reset_clients():
+    """Forgets every client, e.g. when the benchmarks point the services somewhere else"""
+    with _clients_lock:
+        _clients.clear()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Matcher.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Compiled keyword, author and antibiotic matching"""
+
+from collections import deque
+
+from unidecode import unidecode
+
+FIRST_LAST_AUTHOR_SCORE = 25 * 0.375
+MAX_AUTHOR_SCORE = float(25)
+
+def normalize_text(text):
+    return unidecode(text).lower()
+
+class AhoCorasick:
+    """Aho-Corasick automaton: finds which of many patterns occur in a text in one pass over it"""
+    def __init__(self, patterns):
+        self._goto = [dict()]
+        self._fail = [0]
+        self._output = [set()]
+        self._always = set()
+        for index, pattern in enumerate(patterns):
+            if not pattern:
+                self._always.add(index)
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append(dict())
+                    self._fail.append(0)
+                    self._output.append(set())
+                state = next_state
+            self._output[state].add(index)
+        self._build_failure_links()
+        self._output = [frozenset(output) for output in self._output]
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def find(self, text):
+        """Indices of all patterns that occur in text"""
+        found = set(self._always)
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+class PaperMatcher:
+    """Keyword, important author and antibiotic tables compiled once and applied to many papers.
+
+    Gives the same scores as Paper.title_score, Paper.author_score and Paper.score_paper:
+    every keyword found in the title adds its value, and authors add nothing (Paper.author_score
+    resets the score when a paper has no middle authors, which get_all_authors never finds). With
+    score_authors, every important author found in the first or last author's family name adds
+    25 * 0.375 (capped at 25) instead. Antibiotic names found in the title give the paper's
+    colours, in the order of abx_list.
+    """
+    def __init__(self, keywords, important_authors, abx_list = (), abx_colours = None, score_authors = False):
+        self._score_authors = score_authors
+        #Keyword and antibiotic names share one automaton so that a title is only scanned once
+        self._title_patterns = dict()
+        for keyterm, value in keywords:
+            self._add_title_pattern(keyterm, ('keyword', float(value)))
+        for abx in abx_list:
+            self._add_title_pattern(normalize_text(abx), ('abx', abx_colours[abx]))
+        self._title_tags = list(self._title_patterns.values())
+        self._titles = AhoCorasick(self._title_patterns.keys())
+
+        #Only compiled when author scores are used at all
+        self._authors = None
+        if score_authors:
+            author_counts = dict()
+            for author in important_authors:
+                author_counts[author] = author_counts.get(author, 0) + 1
+            self._author_counts = list(author_counts.values())
+            self._authors = AhoCorasick(author_counts.keys())
+
+    def _add_title_pattern(self, pattern, tag):
+        self._title_patterns.setdefault(pattern, []).append(tag)
+
+    def match_title(self, paper):
+        """(keyword score, antibiotic colours) for the paper's title"""
+        title = paper.get_normalized_title()
+        if not title:
+            return float(0), []
+        score = float(0)
+        colours = []
+        for index in sorted(self._titles.find(title)):
+            for kind, value in self._title_tags[index]:
+                if kind == 'keyword':
+                    score += value
+                else:
+                    colours.append(value)
+        return score, colours
+
+    def title_score(self, paper):
+        return self.match_title(paper)[0]
+
+    def colours(self, paper):
+        return self.match_title(paper)[1]
+
+    def _name_score(self, name):
+        if not name:
+            return float(0)
+        matches = self._authors.find(normalize_text(name))
+        return FIRST_LAST_AUTHOR_SCORE * sum(self._author_counts[index] for index in matches)
+
+    def author_score(self, paper):
+        if not self._score_authors:
+            return float(0)
+        author_score = self._name_score(paper.get_first_author()) + self._name_score(paper.get_last_author())
+        return min(author_score, MAX_AUTHOR_SCORE)
+
+    def score_paper(self, paper):
+        return 3 * self.title_score(paper) + self.author_score(paper)
+
+    def scores(self, paper):
+        """(total, title, author) scores"""
+        title_score = self.title_score(paper)
+        author_score = self.author_score(paper)
+        return 3 * title_score + author_score, title_score, author_score
+
+    def match_many(self, papers):
+        """(total score, title score, author score, colours) for each paper, scanning each title once"""
+        results = []
+        for paper in papers:
+            title_score, colours = self.match_title(paper)
+            author_score = self.author_score(paper)
+            results.append((3 * title_score + author_score, title_score, author_score, colours))
+        return results
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Metrics.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Latency histograms and counters for external calls and pipeline stages"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+import json
+import os
+import tempfile
+import threading
+import time
+
+#Upper bounds in seconds, doubling from 0.1 ms to about 105 s; the last bucket takes the rest
+BUCKETS = tuple(0.0001 * 2 ** i for i in range(21))
+
+class Histogram:
+    """Fixed log-scale buckets, so recording is O(log buckets) and memory does not grow with the run"""
+    def __init__(self):
+        self._counts = [0] * (len(BUCKETS) + 1)
+        self._count = 0
+        self._total = 0.0
+        self._min = None
+        self._max = None
+
+    def observe(self, seconds):
+        self._counts[bisect_left(BUCKETS, seconds)] += 1
+        self._count += 1
+        self._total += seconds
+        self._min = seconds if self._min is None else min(self._min, seconds)
+        self._max = seconds if self._max is None else max(self._max, seconds)
+
+    def get_count(self):
+        return self._count
+
+    def get_total(self):
+        return self._total
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (capped at the largest value seen)"""
+        if not self._count:
+            return None
+        rank = q * self._count
+        seen = 0
+        for i, count in enumerate(self._counts):
+            seen += count
+            if count and seen >= rank:
+                return min(BUCKETS[i], self._max) if i < len(BUCKETS) else self._max
+        return self._max
+
+    def to_dict(self):
+        return {'count': self._count,
+                'total': self._total,
+                'mean': self._total / self._count if self._count else None,
+                'min': self._min,
+                'p50': self.quantile(0.5),
+                'p90': self.quantile(0.9),
+                'p99': self.quantile(0.99),
+                'max': self._max,
+                'buckets': {f"{bound:g}": count for bound, count in zip(BUCKETS + (float('inf'),), self._counts)
+                            if count}}
+
+class Metrics:
+    """Thread-safe registry of named latency histograms and counters.
+
+    Timings are named by kind, e.g. 'crossref', 'pubmed.esearch' for external calls and
+    'stage.score' for pipeline stages; counters are free-form, e.g. 'action.NewPaper'.
+    """
+    def __init__(self):
+        self._histograms = dict()
+        self._counters = dict()
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._exporter = None
+        self._stop_export = threading.Event()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def count(self, name, n = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def get_count(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._started = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            return {'time': time.time(),
+                    'elapsed': time.time() - self._started,
+                    'timings': {name: histogram.to_dict() for name, histogram in sorted(self._histograms.items())},
+                    'counters': dict(sorted(self._counters.items()))}
+
+    def summary(self):
+        snapshot = self.snapshot()
+        lines = [f"Run metrics after {snapshot['elapsed']:.1f}s",
+                 f"{'timing':<28}{'count':>8}{'total s':>10}{'mean ms':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for name, timing in snapshot['timings'].items():
+            lines.append(f"{name:<28}{timing['count']:>8}{timing['total']:>10.2f}"
+                         + ''.join(f"{timing[key] * 1000:>10.1f}" for key in ('mean', 'p50', 'p90', 'p99', 'max')))
+        lines.append(f"{'counter':<28}{'value':>8}")
+        for name, value in snapshot['counters'].items():
+            lines.append(f"{name:<28}{value:>8}")
+        return '\n'.join(lines)
+
+    def write(self, path):
+        """Writes a JSON snapshot to path, replacing the old file atomically"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(self.snapshot(), file, indent=1)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def start_export(self, path, every = 10):
+        """Rewrites path every `every` seconds from a background thread until stop_export()"""
+        def export():
+            while not self._stop_export.wait(every):
+                self.write(path)
+        self._stop_export.clear()
+        self._exporter = threading.Thread(target=export, name='metrics-export', daemon=True)
+        self._exporter.start()
+
+    def stop_export(self):
+        self._stop_export.set()
+        if self._exporter:
+            self._exporter.join()
+            self._exporter = None
+
+#Shared by every module, like Paper.doi_table
+metrics = Metrics()
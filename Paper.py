@@ -8,35 +8,201 @@
 
 """Paper and PaperNode classes"""
 
-from anytree import NodeMixin
-import networkx as nx 
+from array import array
+import sys
+import threading
+
 from unidecode import unidecode
+from DOI import canonical_doi
+
+class DOITable:
+    """Interned DOIs shared by all papers, so that references are stored as integer ids.
+
+    The inline Crossref metadata of a reference (title, author, year) is kept once per DOI,
+    from the first paper that cites it.
+    """
+    def __init__(self):
+        self._ids = dict()
+        self._dois = []
+        self._metadata = []
+        self._lock = threading.Lock()
+
+    def intern(self, doi, metadata = None):
+        doi_id = self._ids.get(doi)
+        if doi_id is not None:
+            return doi_id
+        with self._lock:
+            doi_id = self._ids.get(doi)
+            if doi_id is None:
+                doi_id = len(self._dois)
+                self._dois.append(doi)
+                self._metadata.append(metadata)
+                self._ids[doi] = doi_id
+        return doi_id
+
+    def get_id(self, doi):
+        return self._ids.get(doi)
+
+    def get_DOI(self, doi_id):
+        return self._dois[doi_id]
+
+    def get_metadata(self, doi_id):
+        return self._metadata[doi_id]
+
+    def __len__(self):
+        return len(self._dois)
+
+doi_table = DOITable()
+
+def renew_doi_table(max_dois = 0):
+    """Starts a fresh doi_table for papers made from now on if the current one holds more than max_dois
+    DOIs; True if it did. Papers keep the table they were made with, so an old table is freed with
+    the last of its papers."""
+    global doi_table
+    if len(doi_table) <= max_dois:
+        return False
+    doi_table = DOITable()
+    return True
+
+def _intern(text):
+    return sys.intern(text) if isinstance(text, str) else text
+
+def _family_names(author):
+    if not author:
+        return None
+    if isinstance(author, str):
+        return (_intern(author),)
+    return tuple(_intern(name.get('family')) if isinstance(name, dict) else None for name in author)
+
+def _reference_metadata(reference, unstructured = False):
+    title = reference.get('article-title')
+    author = reference.get('author')
+    year = reference.get('year')
+    #The free-text citation is only worth keeping when there is no DOI to go by
+    text = reference.get('unstructured') if unstructured else None
+    if title is None and author is None and year is None and text is None:
+        return None
+    if text is None:
+        return (_intern(title), _intern(author), year)
+    return (_intern(title), _intern(author), year, text)
+
+class Reference:
+    """A reference as listed by the citing paper, materialized only when the walker picks it"""
+    __slots__ = ('_DOI', '_title', '_author', '_year', '_unstructured')
+
+    def __init__(self, DOI, metadata):
+        self._DOI = DOI
+        self._title, self._author, self._year = metadata[:3] if metadata else (None, None, None)
+        self._unstructured = metadata[3] if metadata and len(metadata) > 3 else None
+
+    def __repr__(self) -> str:
+        return f"Reference {self._DOI}, author: {self._author}, year: {self._year}, title: {self._title}"
+
+    def get_DOI(self):
+        return self._DOI
+
+    def get_title(self):
+        return self._title
+
+    def get_first_author(self):
+        return self._author
+
+    def get_last_author(self):
+        #Crossref only lists the first author of a reference
+        return None
+
+    def get_normalized_title(self):
+        return unidecode(self._title).lower() if self._title else None
+
+    def get_year(self):
+        return self._year
+
+    def get_unstructured(self):
+        """Free-text citation, only kept for references without a DOI"""
+        return self._unstructured
+
+class ReferenceList:
+    """Read-only sequence view of a paper's references"""
+    __slots__ = ('_paper',)
+
+    def __init__(self, paper):
+        self._paper = paper
+
+    def __len__(self):
+        return len(self._paper._reference_ids)
+
+    def __getitem__(self, position):
+        return self._paper._make_reference(self._paper._reference_ids[position])
+
+    def __iter__(self):
+        for reference_id in self._paper._reference_ids:
+            yield self._paper._make_reference(reference_id)
 
 class Paper:
+    """A work and its reference list.
+
+    References are stored as ids into the doi_table current when it was made (negative ids index its own
+    DOI-less references) and only turned into Reference objects when accessed.
+    """
+    __slots__ = ('_DOI', '_title', '_author', '_year', '_name', '_normalized_title',
+                 '_reference_ids', '_unresolved', '_table')
+
     def __init__(self, DOI, title, author, year, references = None):
-        self._DOI = DOI
+        self._DOI = canonical_doi(DOI)
         self._title = title[0] if title else None
-        self._author = author
+        self._author = _family_names(author)
         self._year = year
         self._name = self.make_name()
-        self._references = []
+        self._normalized_title = None
+        self._reference_ids = array('q')
+        self._unresolved = None
+        self._table = doi_table
         if references:
             self.add_references(references)
     
     def add_references(self, references):
+        unresolved = list(self._unresolved) if self._unresolved else []
         for i in references:
-            doi = i['DOI'] if 'DOI' in i else None
-            title = i['article-title'] if 'article-title' in i else None
-            author = i['author'] if 'author' in i else None
-            year = i['year'] if 'year' in i else None
-            ref = Paper(doi, title, author, year)
-            self._references.append(ref)                     
+            doi = canonical_doi(i['DOI']) if 'DOI' in i else None
+            metadata = _reference_metadata(i, unstructured=not doi)
+            if doi:
+                self._reference_ids.append(self._table.intern(doi, metadata))
+            else:
+                unresolved.append(metadata)
+                self._reference_ids.append(-len(unresolved))
+        self._unresolved = tuple(unresolved) if unresolved else None
+
+    def _make_reference(self, reference_id):
+        if reference_id >= 0:
+            return Reference(self._table.get_DOI(reference_id), self._table.get_metadata(reference_id))
+        return Reference(None, self._unresolved[-reference_id - 1])
+
+    def __getstate__(self):
+        #Table ids only mean something in this process, so pickles carry the DOIs themselves
+        references = [(self._table.get_DOI(i), self._table.get_metadata(i)) if i >= 0
+                      else (None, self._unresolved[-i - 1]) for i in self._reference_ids]
+        return (self._DOI, self._title, self._author, self._year, references)
+
+    def __setstate__(self, state):
+        self._DOI, self._title, self._author, self._year, references = state
+        self._name = self.make_name()
+        self._normalized_title = None
+        self._reference_ids = array('q')
+        self._table = doi_table
+        unresolved = []
+        for doi, metadata in references:
+            if doi:
+                self._reference_ids.append(self._table.intern(doi, metadata))
+            else:
+                unresolved.append(metadata)
+                self._reference_ids.append(-len(unresolved))
+        self._unresolved = tuple(unresolved) if unresolved else None
     
     def __repr__(self) -> str:
         return f"""
         Paper {self._DOI}, author: {self.get_first_author()}, year: {self._year},
         title: {self._title}
-        {len(self._references)} references
+        {len(self._reference_ids)} references
         """
     
     def __hash__(self): 
@@ -49,14 +215,14 @@ class Paper:
     
     def get_first_author(self): 
         try: 
-            author = self._author[0]['family']
+            author = self._author[0]
         except: 
             author = None
         return author
     
     def get_last_author(self):
         try:
-            author = self._author[-1]['family']
+            author = self._author[-1]
         except:
             author = None
         return author
@@ -73,11 +239,20 @@ class Paper:
         return authors_list
     
     def get_references(self):
-        return self._references
+        return ReferenceList(self)
+
+    def get_reference_DOIs(self):
+        """DOIs of the references (None for those without one), without materializing them"""
+        return [self._table.get_DOI(i) if i >= 0 else None for i in self._reference_ids]
     
     def get_title(self): 
         return self._title
     
+    def get_normalized_title(self):
+        if self._normalized_title is None and self._title:
+            self._normalized_title = unidecode(self._title).lower()
+        return self._normalized_title
+
     def get_DOI(self):
         return self._DOI
     
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Prefetch.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Speculative background fetching of references"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import threading
+
+from Metrics import metrics
+
+class Prefetcher:
+    """Resolves references ahead of the walker on a small worker pool.
+
+    fetch_paper(doi, speculative=event) must return a Paper or None; speculative fetches should give
+    way to (or be dropped for) the walkers' own requests until the event is set, which get() does
+    when the walker turns out to need a paper still being fetched (see Http.HttpClient.get). At
+    most max_queued fetches are pending at once, further requests are dropped rather than queued.
+    A fetch that fails with Http.TransientError (e.g. BusyError) is forgotten, so the DOI may be
+    prefetched again later. Finished papers are kept in memory (up to max_kept) until the walker
+    asks for them with get(). order(paper), if given, returns
+    the reference DOIs worth prefetching, first things first (e.g. ReferenceTriage.ranked_DOIs).
+    decided(doi), if given, returns the walk's live decision for a DOI (e.g. DecisionCache.get) or
+    None; DOIs already scored, or failed recently, are not fetched again.
+    """
+    def __init__(self, fetch_paper, max_workers = 4, max_queued = 32, max_kept = 256, order = None, decided = None):
+        self._fetch_paper = fetch_paper
+        self._order = order
+        self._decided = decided
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self._max_queued = max_queued
+        self._max_kept = max_kept
+        self._futures = OrderedDict()
+        #Reentrant: a fetch that is already done runs its callback while prefetch() holds the lock
+        self._lock = threading.RLock()
+
+    def _pending(self):
+        return sum(1 for future, _ in self._futures.values() if not future.done())
+
+    def prefetch(self, dois):
+        with self._lock:
+            pending = self._pending()
+            for doi in dois:
+                if pending >= self._max_queued:
+                    break
+                if doi in self._futures:
+                    continue
+                needed = threading.Event()
+                future = self._executor.submit(self._fetch_paper, doi, speculative=needed)
+                self._futures[doi] = (future, needed)
+                future.add_done_callback(partial(self._done, doi))
+                pending += 1
+            while len(self._futures) > self._max_kept:
+                _, (future, _) = self._futures.popitem(last=False)
+                future.cancel()
+
+    def _worth_fetching(self, doi, skip):
+        if not doi or doi in skip:
+            return False
+        if self._decided and self._decided(doi) is not None:
+            metrics.count('prefetch.decided')
+            return False
+        return True
+
+    def _done(self, doi, future):
+        from Http import TransientError
+        if future.cancelled() or not isinstance(future.exception(), TransientError):
+            return
+        metrics.count('prefetch.transient')
+        with self._lock:
+            if self._futures.get(doi, (None,))[0] is future:
+                del self._futures[doi]
+
+    def prefetch_paper(self, paper, skip = ()):
+        dois = self._order(paper) if self._order else paper.get_reference_DOIs()
+        self.prefetch(doi for doi in dois if self._worth_fetching(doi, skip))
+
+    def prefetch_top(self, paper_counter, n = 5, skip = ()):
+        top = sorted(paper_counter.items(), key=lambda item: item[1], reverse=True)[:n]
+        for paper, _ in top:
+            self.prefetch_paper(paper, skip)
+
+    def has(self, doi):
+        with self._lock:
+            return doi in self._futures
+
+    def get(self, doi):
+        """Paper for doi if it was prefetched (waiting on it if still in flight), else None"""
+        with self._lock:
+            future, needed = self._futures.pop(doi, (None, None))
+        #Still queued behind other prefetches, the walker is better off fetching it itself; already
+        #waiting for spare capacity, it is sent as soon as the walker's own request would be
+        if future is not None and not future.done() and not future.cancel():
+            needed.set()
+        if future is None or future.cancelled():
+            metrics.count('prefetch.miss')
+            return None
+        try:
+            with metrics.timer('wait.prefetch'):
+                paper = future.result()
+        except Exception:
+            metrics.count('prefetch.failed')
+            return None
+        metrics.count('prefetch.hit' if paper else 'prefetch.failed')
+        return paper
+
+    def cancel(self):
+        """Drop fetches that have not started yet, e.g. after the walker jumps back to start"""
+        with self._lock:
+            for doi in list(self._futures):
+                if self._futures[doi][0].cancel():
+                    del self._futures[doi]
+
+    def close(self):
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
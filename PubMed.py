@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	PubMed.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Minimal NCBI E-utilities client with a configurable endpoint, and batched enrichment"""
+
+from collections import OrderedDict
+from concurrent.futures import Future
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+
+from DOI import canonical_doi
+from Http import get_client
+from Metrics import metrics
+
+EUTILS_URL = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils'
+
+class PubMedArticle:
+    """The fields of a PubMed record that make_paper_from_query uses, named as in metapub"""
+    def __init__(self, pmid, title, authors, year, doi = None):
+        self.pmid = pmid
+        self.title = title
+        self.authors = authors
+        self.year = year
+        self.doi = doi
+
+    @classmethod
+    def from_xml(cls, element):
+        pmid = element.findtext('.//MedlineCitation/PMID')
+        title = element.findtext('.//Article/ArticleTitle')
+        authors = []
+        for author in element.findall('.//Article/AuthorList/Author'):
+            last_name = author.findtext('LastName')
+            if last_name:
+                initials = author.findtext('Initials')
+                authors.append(f"{last_name} {initials}" if initials else last_name)
+        year = element.findtext('.//Article/Journal/JournalIssue/PubDate/Year')
+        doi = (element.findtext(".//PubmedData/ArticleIdList/ArticleId[@IdType='doi']")
+               or element.findtext(".//Article/ELocationID[@EIdType='doi']"))
+        return cls(pmid, title, authors, int(year) if year and year.isdigit() else None, doi)
+
+    def to_enrichment(self):
+        """The dict cached by main.pubmed_enrichment"""
+        return {'pmid': self.pmid,
+                'title': self.title,
+                'authors': self.authors,
+                'year': self.year}
+
+class EutilsClient:
+    """Drop-in for the two PubMedFetcher calls used here, through the shared Http client for NCBI
+    (rate limited, retried and behind a circuit breaker; see Http.HostPolicy for **policy).
+
+    base_url can point at a local stand-in for NCBI (see benchmarks/FakeServer.py).
+    """
+    def __init__(self, base_url = EUTILS_URL, api_key = None, email = None, timeout = 30, rate = None, **policy):
+        self._base_url = base_url.rstrip('/')
+        self._params = dict()
+        if api_key:
+            self._params['api_key'] = api_key
+        if email:
+            self._params['email'] = email
+        self._http = get_client(self._base_url, name='pubmed', rate=rate, timeout=timeout, **policy)
+
+    def _get(self, utility, **params):
+        response = self._http.get(f"{self._base_url}/{utility}", params={**self._params, **params})
+        return ElementTree.fromstring(response.content)
+
+    def pmids_for_query(self, query, retmax = 20):
+        root = self._get('esearch.fcgi', db='pubmed', term=query, retmax=retmax)
+        return [element.text for element in root.findall('./IdList/Id')]
+
+    def articles_by_pmids(self, pmids):
+        if not pmids:
+            return []
+        root = self._get('efetch.fcgi', db='pubmed', id=','.join(map(str, pmids)), retmode='xml')
+        return [PubMedArticle.from_xml(element) for element in root.findall('./PubmedArticle')]
+
+    def article_by_pmid(self, pmid):
+        articles = self.articles_by_pmids([pmid])
+        return articles[0] if articles else None
+
+    def enrich_many(self, dois):
+        """doi -> enrichment dict ({} if not in PubMed) for all dois, in one search and one fetch"""
+        dois = list(dois)
+        term = ' OR '.join(f'"{canonical_doi(doi) or doi}"[aid]' for doi in dois)
+        pmids = self.pmids_for_query(term, retmax=2 * len(dois))
+        found = dict()
+        for article in self.articles_by_pmids(pmids):
+            key = canonical_doi(article.doi or '')
+            if key and key not in found:
+                found[key] = article.to_enrichment()
+        return {doi: found.get(canonical_doi(doi) or doi, {}) for doi in dois}
+
+class PubMedBatcher:
+    """Coalesces concurrent single-DOI lookups into multi-ID E-utilities requests.
+
+    enrich(doi) blocks until its batch is back. A batch is sent once max_batch DOIs are waiting,
+    or max_delay seconds after the first of them arrived, and never sooner than rate allows
+    (each batch is two requests), so callers that turn up while a batch is held back join it.
+    """
+    def __init__(self, client, max_batch = 50, max_delay = 0.1, rate = 3):
+        self._client = client
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._min_interval = 2 / rate if rate else 0
+        self._pending = OrderedDict()
+        self._condition = threading.Condition()
+        self._last_sent = 0.0
+        self._thread = None
+
+    def submit(self, doi):
+        with self._condition:
+            future = self._pending.get(doi)
+            if future is None:
+                future = self._pending[doi] = Future()
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='pubmed-batcher', daemon=True)
+                    self._thread.start()
+                self._condition.notify()
+            return future
+
+    def enrich(self, doi):
+        return self.submit(doi).result()
+
+    def _take_batch(self):
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            earliest = self._last_sent + self._min_interval
+            send_at = max(time.monotonic() + self._max_delay, earliest)
+            while True:
+                #A full batch goes as soon as the rate limit allows, otherwise wait for more to join
+                until = earliest if len(self._pending) >= self._max_batch else send_at
+                remaining = until - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = [self._pending.popitem(last=False) for _ in range(min(self._max_batch, len(self._pending)))]
+            self._last_sent = time.monotonic()
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            try:
+                with metrics.timer('pubmed.batch'):
+                    results = self._client.enrich_many([doi for doi, _ in batch])
+            except Exception as error:
+                for _, future in batch:
+                    future.set_exception(error)
+                continue
+            metrics.count('pubmed.batches')
+            metrics.count('pubmed.batched_dois', len(batch))
+            for doi, future in batch:
+                future.set_result(results.get(doi, {}))
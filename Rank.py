@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Rank.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Exact personalized PageRank over the discovered citation graph"""
+
+import numpy as np
+
+class CitationChain:
+    """The walk surf() takes over the papers it fetched, written out as a sparse transition matrix.
+
+    From a paper with no references the surfer jumps uniformly to any known paper. Otherwise it
+    goes back to a starting paper with probability back_to_start_weight, or follows one of the
+    references that were fetched, chosen in proportion to its weight: to that paper if it was
+    accepted, or uniformly to any known paper if it scored too low. If none of the references were
+    fetched it jumps to any known paper, as surf() does after running out of attempts.
+
+    papers maps DOI -> (Paper, accepted) for every fetched paper; starting papers count as accepted.
+    resolve maps a reference DOI to the key used in papers. weigh(paper), if given, returns a weight
+    for each of the paper's references as surf() picks them (e.g. ReferenceTriage.weights);
+    otherwise all references weigh the same. References without a DOI are not followed.
+    """
+    def __init__(self, starting_papers, papers, back_to_start_weight = 0.15, resolve = None, weigh = None):
+        resolve = resolve or (lambda doi: doi)
+        self._papers = [paper for paper in starting_papers]
+        self._index = {paper.get_DOI(): i for i, paper in enumerate(self._papers)}
+        self._n_starting = len(self._papers)
+        for doi, (paper, accepted) in papers.items():
+            if accepted and doi not in self._index:
+                self._index[doi] = len(self._papers)
+                self._papers.append(paper)
+        rejected = {doi for doi, (_, accepted) in papers.items() if not accepted and doi not in self._index}
+
+        n = len(self._papers)
+        beta = back_to_start_weight
+        sources, targets, weights = [], [], []
+        to_start = np.zeros(n)
+        to_any = np.zeros(n)
+        for i, paper in enumerate(self._papers):
+            references = paper.get_reference_DOIs()
+            if not references:
+                to_any[i] = 1
+                continue
+            fetched = []
+            for doi, weight in zip(references, weigh(paper) if weigh else [1.0] * len(references)):
+                doi = resolve(doi) if doi else None
+                if weight and (doi in self._index or doi in rejected):
+                    fetched.append((doi, weight))
+            to_start[i] = beta
+            if not fetched:
+                to_any[i] = 1 - beta
+                continue
+            total = sum(weight for _, weight in fetched)
+            for doi, weight in fetched:
+                weight = (1 - beta) * weight / total
+                if doi in self._index:
+                    sources.append(i)
+                    targets.append(self._index[doi])
+                    weights.append(weight)
+                else:
+                    to_any[i] += weight
+        self._sources = np.array(sources, dtype=np.int64)
+        self._targets = np.array(targets, dtype=np.int64)
+        self._weights = np.array(weights, dtype=np.float64)
+        self._to_start = to_start
+        self._to_any = to_any
+
+    def get_papers(self):
+        return self._papers
+
+    def step(self, distribution):
+        n = len(self._papers)
+        following = np.bincount(self._targets, weights=distribution[self._sources] * self._weights, minlength=n)
+        following[:self._n_starting] += distribution @ self._to_start / self._n_starting
+        following += distribution @ self._to_any / n
+        return following
+
+    def stationary(self, tol = 1e-12, max_iter = 10000):
+        """Stationary distribution by power iteration, as an array aligned with get_papers()"""
+        n = len(self._papers)
+        distribution = np.zeros(n)
+        distribution[:self._n_starting] = 1 / self._n_starting
+        for _ in range(max_iter):
+            following = self.step(distribution)
+            if np.abs(following - distribution).sum() < tol:
+                return following
+            distribution = following
+        return distribution
+
+def personalized_pagerank(starting_papers, papers, back_to_start_weight = 0.15, resolve = None, steps = 1,
+                          weigh = None):
+    """Expected visits to each non-starting paper over steps walk steps, as a Paper -> visits dict"""
+    if not starting_papers:
+        return dict()
+    chain = CitationChain(starting_papers, papers, back_to_start_weight, resolve, weigh)
+    distribution = chain.stationary()
+    starting = set(paper.get_DOI() for paper in starting_papers)
+    return {paper: float(probability * steps)
+            for paper, probability in zip(chain.get_papers(), distribution)
+            if paper.get_DOI() not in starting}
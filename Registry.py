@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Registry.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""DOI-indexed paper registry"""
+
+from Paper import Paper
+
+class PaperRegistry:
+    """Papers indexed by DOI, with O(1) lookup, insertion and uniform sampling.
+
+    Papers are kept in insertion order in a list, with a dict from DOI to list position,
+    so choice() never has to copy the collection. Membership accepts a Paper or a DOI.
+    """
+    def __init__(self, papers = ()):
+        self._papers = []
+        self._index = dict()
+        for paper in papers:
+            self.add(paper)
+
+    def add(self, paper: Paper):
+        doi = paper.get_DOI()
+        if doi in self._index:
+            return False
+        self._index[doi] = len(self._papers)
+        self._papers.append(paper)
+        return True
+
+    def get(self, doi, default = None):
+        position = self._index.get(doi)
+        if position is None:
+            return default
+        return self._papers[position]
+
+    def choice(self, rng):
+        return rng.choice(self._papers)
+
+    def __getitem__(self, position):
+        return self._papers[position]
+
+    def __contains__(self, item):
+        if isinstance(item, Paper):
+            item = item.get_DOI()
+        return item in self._index
+
+    def __len__(self):
+        return len(self._papers)
+
+    def __iter__(self):
+        return iter(self._papers)
+
+    def __bool__(self):
+        return bool(self._papers)
+
+def choice_from(rng, *registries):
+    """Uniform choice over the union of disjoint registries without building the union"""
+    total = sum(len(registry) for registry in registries)
+    if not total:
+        raise IndexError('Cannot choose from empty registries')
+    position = rng.randrange(total)
+    for registry in registries:
+        if position < len(registry):
+            return registry[position]
+        position -= len(registry)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Render.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Headless rendering of the surfed DAG, separate from the crawl
+
+Usage: python Render.py surf_graph.json surf_graph.svg [--max-nodes N] [--no-prune]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import networkx as nx
+
+from Metrics import metrics
+
+DEFAULT_COLOUR = '#ADACAC'
+
+def save_graph(graph, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(nx.node_link_data(graph, edges='links'), file)
+
+def load_graph(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return nx.node_link_graph(json.load(file), edges='links')
+
+def graph_key(graph, prog):
+    """Content hash of the graph's nodes and edges, so layouts can be reused across runs"""
+    content = json.dumps([prog,
+                          sorted(map(str, graph.nodes)),
+                          sorted((str(u), str(v)) for u, v in graph.edges())])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def compute_layout(graph, prog = 'dot'):
+    try:
+        return nx.nx_agraph.graphviz_layout(graph, prog=prog)
+    except (ImportError, OSError):
+        print(f"Graphviz ({prog}) not available, falling back to a spring layout")
+        return nx.spring_layout(graph, seed=0, scale=1000)
+
+def layout(graph, prog = 'dot', cache_dir = None):
+    """Node positions, computed once per distinct graph and kept in cache_dir"""
+    cache_path = None
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = os.path.join(cache_dir, f"{graph_key(graph, prog)}.json")
+        if os.path.exists(cache_path):
+            metrics.count('cache.layout.hit')
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                cached = json.load(file)
+            return {node: tuple(cached[str(node)]) for node in graph.nodes}
+        metrics.count('cache.layout.miss')
+    with metrics.timer(f"stage.layout.{prog}"):
+        pos = compute_layout(graph, prog)
+    if cache_path:
+        with open(cache_path, 'w', encoding='utf-8') as file:
+            json.dump({str(node): [float(x), float(y)] for node, (x, y) in pos.items()}, file)
+    return pos
+
+def prune(graph, max_nodes):
+    """Keeps the starting papers and the highest scoring other nodes, up to max_nodes"""
+    starting = [node for node, start in graph.nodes(data='start') if start]
+    others = sorted((node for node, start in graph.nodes(data='start') if not start),
+                    key=lambda node: graph.nodes[node].get('node_size', 0), reverse=True)
+    keep = starting + others[:max(0, max_nodes - len(starting))]
+    return graph.subgraph(keep).copy()
+
+def render(graph, path, max_nodes = 2000, prune_large = True, prog = 'dot', large_prog = 'sfdp',
+           cache_dir = '.layout_cache'):
+    """Draws the graph to path (format from the extension, e.g. .svg or .png) without a display.
+
+    Graphs above max_nodes are pruned to their highest scoring nodes, or if prune_large is
+    False laid out with the faster large_prog instead.
+    """
+    if graph.number_of_nodes() > max_nodes:
+        if prune_large:
+            print(f"Pruning graph from {graph.number_of_nodes()} to {max_nodes} nodes for rendering")
+            graph = prune(graph, max_nodes)
+        else:
+            prog = large_prog
+    #Figure without pyplot never needs a display
+    from matplotlib.figure import Figure
+
+    pos = layout(graph, prog, cache_dir)
+    nodes = list(graph.nodes)
+    figure = Figure(figsize=(20, 14))
+    ax = figure.add_subplot()
+    ax.set_axis_off()
+    nx.draw_networkx_nodes(graph, pos, ax=ax, nodelist=nodes,
+                           node_size=[graph.nodes[n].get('node_size', 20) for n in nodes],
+                           node_color=[graph.nodes[n].get('color', DEFAULT_COLOUR) for n in nodes],
+                           alpha=[graph.nodes[n].get('alpha', 0.9) for n in nodes],
+                           linewidths=[graph.nodes[n].get('line_width', 2) for n in nodes])
+    nx.draw_networkx_edges(graph, pos, ax=ax, alpha=0.4, arrowstyle='<|-')
+    labels = {n: label for n, label in graph.nodes(data='label') if label}
+    nx.draw_networkx_labels(graph, pos, ax=ax, labels=labels,
+                            font_size=6, font_weight='bold', font_family='sans-serif',
+                            horizontalalignment='center', verticalalignment='center')
+    with metrics.timer('stage.draw'):
+        figure.savefig(path, bbox_inches='tight')
+    print(f"DAG drawn to {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Render a saved surf graph')
+    parser.add_argument('graph', help='graph saved by the crawl (JSON)')
+    parser.add_argument('output', help='image to write, .svg or .png')
+    parser.add_argument('--max-nodes', type=int, default=2000)
+    parser.add_argument('--no-prune', action='store_true', help='use a faster layout instead of pruning large graphs')
+    parser.add_argument('--prog', default='dot')
+    parser.add_argument('--cache-dir', default='.layout_cache')
+    args = parser.parse_args()
+    render(load_graph(args.graph), args.output, max_nodes=args.max_nodes, prune_large=not args.no_prune,
+           prog=args.prog, cache_dir=args.cache_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Resolver.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Concurrent resolution of the starting corpus"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from Http import TransientError
+from Metrics import metrics
+
+class CorpusResolver:
+    """Resolves many DOIs into Papers with a bounded number of requests in flight.
+
+    query(doi) is the usual DOI -> Crossref work lookup (main.query_from_DOI: cache, aliases and
+    the shared Http client), returning None if there is no such work and raising
+    Http.TransientError if Crossref is not answering; it is run on max_in_flight threads.
+    make_paper is the usual query -> Paper function, run on pubmed_workers threads since any
+    PubMed enrichment it needs blocks; the more papers in flight at once, the fuller its batched
+    requests. Progress for each DOI goes to log(message), e.g. main.log to follow --quiet; DOIs
+    that could not be fetched because Crossref was not answering are always reported.
+    """
+    def __init__(self, query, make_paper, max_in_flight = 8, pubmed_workers = 16, log = print):
+        self._query = query
+        self._make_paper = make_paper
+        self._max_in_flight = max_in_flight
+        self._pubmed_workers = pubmed_workers
+        self._log = log
+
+    async def _resolve_one(self, crossref_executor, executor, doi, unavailable):
+        loop = asyncio.get_running_loop()
+        try:
+            query = await loop.run_in_executor(crossref_executor, self._query, doi)
+        except TransientError as error:
+            self._log(f"Crossref unavailable, skipping {doi}: {error}")
+            metrics.count('fetch.transient')
+            unavailable.append(doi)
+            return None
+        if not query:
+            return None
+        try:
+            return await loop.run_in_executor(executor, self._make_paper, query)
+        except Exception:
+            self._log(f"Unable to make paper from query for: {doi}")
+            return None
+
+    async def resolve_async(self, dois):
+        unavailable = []
+        with ThreadPoolExecutor(max_workers=self._max_in_flight, thread_name_prefix='crossref') as crossref_executor, \
+             ThreadPoolExecutor(max_workers=self._pubmed_workers) as executor:
+            papers = await asyncio.gather(*(self._resolve_one(crossref_executor, executor, doi, unavailable)
+                                            for doi in dois))
+        if unavailable:
+            print(f"Crossref was unavailable for {len(unavailable)} of {len(dois)} starting DOIs, "
+                  f"left out: {', '.join(unavailable)}")
+        return [paper for paper in papers if paper]
+
+    def resolve(self, dois):
+        return asyncio.run(self.resolve_async(list(dois)))
@@ -0,0 +1,628 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Service.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Long-running surf service: many corpora walked against one warm metadata layer
+
+Usage: python Service.py [--host HOST] [--port PORT | --socket PATH] [--cache PATH] [--max-jobs N]
+
+The metadata cache, HTTP clients, title index, papers fetched by earlier jobs and the compiled
+matchers (with every paper they have scored) stay in memory between jobs, so a job only waits on
+papers that nobody has fetched before. Jobs run concurrently and are driven over local HTTP:
+
+    POST   /jobs              start a job; the body is a JSON object, only corpus is required:
+                              {"corpus": [DOI, ...], "keywords": {term: value} or [[term, value], ...],
+                               "authors": [surname, ...], "stop": "converge" or "steps", "steps": N,
+                               "max_steps": N, "max_seconds": T, "walkers": N, "seed": S,
+                               "triage": true, "top": N}
+                              keywords and authors default to the service's CSVs
+    GET    /jobs              every job, without rankings
+    GET    /jobs/ID           status, progress and the ranking so far (final once done)
+    GET    /jobs/ID/events    NDJSON stream of surf steps as they happen (from ?since=N),
+                              ending with the job as from GET /jobs/ID
+    DELETE /jobs/ID           stops the job after the steps its walkers are on
+    GET    /status            sizes of the warm state and the run metrics
+
+e.g. curl -s localhost:8765/jobs -d '{"corpus": ["10.1586/14787210.4.3.479"], "stop": "steps", "steps": 50}'
+"""
+
+import argparse
+import atexit
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import itertools
+import json
+import os
+import socketserver
+import stat
+import threading
+import time
+
+from unidecode import unidecode
+
+import main
+from Convergence import ConvergenceMonitor
+from Decisions import DecisionCache
+from EventLog import make_event
+from Matcher import PaperMatcher
+from Metrics import metrics
+from Paper import renew_doi_table
+from Prefetch import Prefetcher
+from Registry import PaperRegistry
+from Triage import ReferenceTriage
+from Walkers import WalkerPool
+
+#Finished jobs are forgotten beyond this many. A job's last KEEP_EVENTS steps can be streamed while it
+#runs (up to twice that between trims) and its last KEEP_FINISHED_EVENTS once it is over
+KEEP_FINISHED_JOBS = 100
+KEEP_EVENTS = 10000
+KEEP_FINISHED_EVENTS = 1000
+TOP = 100
+
+QUEUED = 'queued'
+RESOLVING = 'resolving'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+class PaperStore:
+    """Papers fetched by any job, the max_papers most recently used; the part of the citation
+    graph the service already knows. fetch_paper(doi) fills it from the usual Crossref/PubMed path.
+    DOIs that could not be fetched are remembered as in a DecisionCache, whichever job tried them;
+    fetch_paper returning None means there is no such work, which is remembered for good.
+    on_evict(doi), if given, is called for each paper dropped to make room."""
+    def __init__(self, fetch_paper, max_papers = 100000, failure_ttl = 300, on_evict = None):
+        self._fetch_paper = fetch_paper
+        self._max_papers = max_papers
+        self._on_evict = on_evict
+        self._papers = OrderedDict()
+        self._failures = DecisionCache(failure_ttl=failure_ttl, max_decisions=max_papers)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._papers)
+
+    def get(self, doi):
+        with self._lock:
+            paper = self._papers.get(doi)
+            if paper is not None:
+                self._papers.move_to_end(doi)
+        metrics.count(f"service.papers.{'hit' if paper is not None else 'miss'}")
+        return paper
+
+    def add(self, paper):
+        evicted = []
+        with self._lock:
+            self._papers[paper.get_DOI()] = paper
+            self._papers.move_to_end(paper.get_DOI())
+            while len(self._papers) > self._max_papers:
+                evicted.append(self._papers.popitem(last=False)[0])
+        if self._on_evict:
+            for doi in evicted:
+                self._on_evict(doi)
+
+    def fail(self, doi, permanent = False):
+        self._failures.fail(doi, permanent=permanent)
+
+    def get_failure(self, doi):
+        """The failed Decision for doi, None unless it failed (and has not expired)"""
+        failure = self._failures.get(doi)
+        return failure if failure is not None and failure.is_failed() else None
+
+    def is_failed(self, doi):
+        return self.get_failure(doi) is not None
+
+    def fetch_paper(self, doi, speculative = False):
+        paper = self.get(doi)
+        if paper is None and not self.is_failed(doi):
+            paper = self._fetch_paper(doi, speculative=speculative)
+            if paper is None:
+                self.fail(doi, permanent=True)
+            else:
+                self.add(paper)
+        return paper
+
+def ranking_rows(paper_counter, top = None):
+    """Most visited papers first, as the columns of output.csv"""
+    ranked = sorted(paper_counter.items(), key=lambda item: (-item[1], item[0].get_DOI()))
+    return [{'DOI': paper.get_DOI(), 'title': paper.get_title(), 'author': paper.get_first_author(),
+             'times_seen': times_seen} for paper, times_seen in ranked[:top]]
+
+def parse_job(spec):
+    """Job settings from a POSTed JSON object, with main's defaults; raises ValueError if unusable"""
+    if not isinstance(spec, dict):
+        raise ValueError('Job must be a JSON object')
+    corpus = spec.get('corpus')
+    if not corpus or not isinstance(corpus, list) or not all(isinstance(doi, str) for doi in corpus):
+        raise ValueError('corpus must be a non-empty list of DOIs')
+    keywords = spec.get('keywords')
+    if isinstance(keywords, dict):
+        keywords = list(keywords.items())
+    if keywords is not None:
+        try:
+            keywords = [(unidecode(term).lower(), float(value)) for term, value in keywords]
+        except (TypeError, ValueError):
+            raise ValueError('keywords must map terms to numbers')
+    authors = spec.get('authors')
+    if authors is not None and not (isinstance(authors, list) and all(isinstance(name, str) for name in authors)):
+        raise ValueError('authors must be a list of surnames')
+    stop = spec.get('stop', main.STOP)
+    if stop not in ('converge', 'steps'):
+        raise ValueError("stop must be 'converge' or 'steps'")
+    seed = spec.get('seed', main.SEED)
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, (int, str))):
+        raise ValueError('seed must be an integer or a string')
+    try:
+        job = {'corpus': corpus,
+               'keywords': keywords,
+               'authors': [unidecode(name).lower() for name in authors] if authors is not None else None,
+               'stop': stop,
+               'steps': int(spec.get('steps', main.STEPS_PER_WALKER)),
+               'max_steps': int(spec.get('max_steps', main.MAX_STEPS_PER_WALKER)),
+               'max_seconds': float(spec['max_seconds']) if spec.get('max_seconds') is not None else main.MAX_SECONDS,
+               'walkers': int(spec.get('walkers', main.N_WALKERS)),
+               'seed': seed,
+               'triage': bool(spec.get('triage', main.TRIAGE)),
+               'top': int(spec.get('top', TOP))}
+    except (TypeError, ValueError):
+        raise ValueError('steps, max_steps, walkers and top must be integers and max_seconds a number')
+    if job['walkers'] < 1 or job['top'] < 1 or job['steps'] < 0 or job['max_steps'] < 0:
+        raise ValueError('walkers and top must be positive and steps not negative')
+    return job
+
+class Job:
+    """One corpus walked by the service: its settings, status and the steps taken so far.
+
+    Walkers report every step to record() (the WalkerPool sink), which wakes up anyone
+    streaming the job's events. Only the latest events are kept; step numbers count them all.
+    """
+    def __init__(self, job_id, spec):
+        self._id = job_id
+        self._spec = spec
+        self._status = QUEUED
+        self._error = None
+        self._pool = None
+        self._cancelled = False
+        self._events = []
+        self._first = 0
+        self._counts = dict()
+        self._ranking = None
+        self._created = time.time()
+        self._started = None
+        self._finished = None
+        self._condition = threading.Condition()
+
+    def get_id(self):
+        return self._id
+
+    def get_spec(self):
+        return self._spec
+
+    def get_status(self):
+        return self._status
+
+    def is_finished(self):
+        return self._status in FINISHED
+
+    def record(self, walker, step, source, wrapped_paper, depth, counted):
+        event = dict(make_event(walker, step, source, wrapped_paper, depth), type='step')
+        with self._condition:
+            self._events.append(event)
+            if len(self._events) >= 2 * KEEP_EVENTS:
+                self._trim(KEEP_EVENTS)
+            if counted:
+                paper = wrapped_paper.get_paper()
+                self._counts[paper] = self._counts.get(paper, 0) + 1
+            self._condition.notify_all()
+
+    def _trim(self, keep):
+        """Drops all but the last keep events; call with the condition held"""
+        dropped = max(0, len(self._events) - keep)
+        del self._events[:dropped]
+        self._first += dropped
+
+    def _set_status(self, status):
+        with self._condition:
+            self._status = status
+            self._condition.notify_all()
+
+    def resolving(self):
+        """False if the job was cancelled while it waited for a slot"""
+        with self._condition:
+            if self._cancelled:
+                return False
+            self._status = RESOLVING
+            self._started = time.time()
+            return True
+
+    def running(self, pool):
+        """False if the job was cancelled while its corpus was resolved"""
+        with self._condition:
+            if self._cancelled:
+                return False
+            self._pool = pool
+            self._status = RUNNING
+            self._condition.notify_all()
+            return True
+
+    def finish(self, paper_counter = None, error = None):
+        with self._condition:
+            if paper_counter is not None:
+                self._ranking = ranking_rows(paper_counter, self._spec['top'])
+            self._error = str(error) if error else None
+            self._status = FAILED if error else CANCELLED if self._cancelled else DONE
+            self._finished = time.time()
+            self._pool = None
+            self._trim(KEEP_FINISHED_EVENTS)
+            self._condition.notify_all()
+
+    def cancel(self):
+        with self._condition:
+            if self.is_finished():
+                return
+            self._cancelled = True
+            pool = self._pool
+            if self._status == QUEUED:
+                self._status = CANCELLED
+                self._finished = time.time()
+            self._condition.notify_all()
+        if pool:
+            pool.stop()
+
+    def get_finished(self):
+        return self._finished
+
+    def summary(self, ranking = True):
+        with self._condition:
+            summary = {'id': self._id,
+                       'status': self._status,
+                       'error': self._error,
+                       'corpus': len(self._spec['corpus']),
+                       'steps': self._first + len(self._events),
+                       'papers': len(self._counts),
+                       'created': self._created,
+                       'started': self._started,
+                       'finished': self._finished}
+            if ranking:
+                summary['ranking'] = self._ranking if self._ranking is not None \
+                    else ranking_rows(self._counts, self._spec['top'])
+        return summary
+
+    def stream(self, since = 0):
+        """Step events from number since onwards as they happen (from the oldest kept if those are
+        gone), then the summary once the job ends"""
+        position = since
+        while True:
+            with self._condition:
+                while position >= self._first + len(self._events) and not self.is_finished():
+                    self._condition.wait(1.0)
+                position = max(position, self._first)
+                events = self._events[position - self._first:]
+                finished = self.is_finished()
+                end = self._first + len(self._events)
+            position += len(events)
+            yield from events
+            if finished and position >= end:
+                yield dict(self.summary(), type='job')
+                return
+
+class SurfService:
+    """Runs jobs on max_jobs threads against state shared by all of them.
+
+    Papers are kept in a PaperStore. Scoring depends on the keywords and important authors, so a
+    matcher, its triage and its DecisionCache (every paper it has accepted or rejected) are kept
+    for each of the max_matchers most recently used combinations; jobs that share one never fetch
+    or score the same paper twice. A decision is forgotten when its paper leaves the PaperStore, so
+    decisions hold no papers the store has let go. Between jobs, the table of interned reference DOIs
+    is started afresh once it holds max_dois. Cache, aliases, title index and HTTP clients are main's.
+    """
+    def __init__(self, keywords, important_authors, abx_list = (), abx_colours = None, max_jobs = 4,
+                 max_papers = 100000, max_matchers = 8, max_dois = 2000000, verbose = True):
+        self._default_keywords = [(term, float(value)) for term, value in keywords]
+        self._default_authors = list(important_authors)
+        self._abx_list = abx_list
+        self._abx_colours = abx_colours
+        self._max_papers = max_papers
+        self._max_matchers = max_matchers
+        self._max_dois = max_dois
+        self._verbose = verbose
+        self._scoring = OrderedDict()
+        self._scoring_lock = threading.Lock()
+        self._papers = PaperStore(main.fetch_paper, max_papers, failure_ttl=main.FAILED_FETCH_TTL,
+                                  on_evict=self._forget)
+        self._jobs = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix='job')
+
+    def get_papers(self):
+        return self._papers
+
+    def submit(self, spec):
+        job = Job(str(next(self._ids)), parse_job(spec))
+        with self._jobs_lock:
+            self._jobs[job.get_id()] = job
+            finished = [old for old in self._jobs.values() if old.is_finished()]
+            for old in finished[:max(0, len(finished) - KEEP_FINISHED_JOBS)]:
+                del self._jobs[old.get_id()]
+        self._executor.submit(self._run, job)
+        metrics.count('service.jobs')
+        return job
+
+    def get_job(self, job_id):
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def get_jobs(self):
+        with self._jobs_lock:
+            return list(self._jobs.values())
+
+    def get_status(self):
+        jobs = self.get_jobs()
+        return {'jobs': {status: sum(1 for job in jobs if job.get_status() == status)
+                         for status in (QUEUED, RESOLVING, RUNNING, DONE, FAILED, CANCELLED)},
+                'papers': len(self._papers),
+                'matchers': len(self._scoring),
+                'titles': len(main.get_titles()),
+                'metrics': metrics.snapshot()}
+
+    def _resolve_corpus(self, corpus):
+        """Starting papers in corpus order, fetching only those no job has seen"""
+        aliases = main.get_aliases()
+        dois = list(dict.fromkeys(doi for doi in map(aliases.resolve, corpus) if doi))
+        papers = {doi: self._papers.get(doi) for doi in dois}
+        missing = [doi for doi, paper in papers.items() if paper is None]
+        if missing:
+            from Resolver import CorpusResolver
+            resolver = CorpusResolver(main.query_from_DOI, main.make_paper_from_query,
+                                      max_in_flight=main.MAX_IN_FLIGHT, log=main.log)
+            for paper in resolver.resolve(missing):
+                self._papers.add(paper)
+            for doi in missing:
+                papers[doi] = self._papers.get(aliases.resolve(doi))
+        starting_papers = PaperRegistry()
+        for paper in papers.values():
+            if paper is not None:
+                starting_papers.add(paper)
+        return starting_papers
+
+    def _scoring_for(self, keywords, important_authors):
+        """(matcher, triage, decisions) for these keywords and authors, shared with earlier jobs"""
+        key = (tuple(keywords), tuple(important_authors))
+        with self._scoring_lock:
+            scoring = self._scoring.get(key)
+            if scoring is not None:
+                self._scoring.move_to_end(key)
+                metrics.count('service.matchers.hit')
+                return scoring
+            metrics.count('service.matchers.miss')
+            matcher = PaperMatcher(keywords, important_authors, self._abx_list, self._abx_colours,
+                                   score_authors=main.SCORE_AUTHORS)
+            triage = ReferenceTriage(matcher, low_score=main.LOW_SCORE, promising_weight=main.TRIAGE_PROMISING_WEIGHT,
+                                     irrelevant_weight=main.TRIAGE_IRRELEVANT_WEIGHT, titles=main.get_titles())
+            decisions = DecisionCache(failure_ttl=main.FAILED_FETCH_TTL, max_decisions=self._max_papers)
+            scoring = self._scoring[key] = (matcher, triage, decisions)
+            while len(self._scoring) > self._max_matchers:
+                self._scoring.popitem(last=False)
+            return scoring
+
+    def _forget(self, doi):
+        """Drops every decision on a paper the PaperStore let go"""
+        with self._scoring_lock:
+            scorings = list(self._scoring.values())
+        for _, _, decisions in scorings:
+            decisions.forget(doi)
+
+    def _important_authors(self, authors, starting_papers):
+        """The job's authors (else the service's), plus the first and last authors of its corpus, as in main"""
+        important_authors = list(authors if authors is not None else self._default_authors)
+        for paper in starting_papers:
+            for author in (paper.get_first_author(), paper.get_last_author()):
+                if isinstance(author, str):
+                    author = unidecode(author).lower()
+                    if author not in important_authors:
+                        important_authors.append(author)
+        return important_authors
+
+    def _run(self, job):
+        spec = job.get_spec()
+        if not job.resolving():
+            return
+        try:
+            with metrics.timer('service.resolve_corpus'):
+                starting_papers = self._resolve_corpus(spec['corpus'])
+            if not starting_papers:
+                raise ValueError('None of the corpus DOIs could be resolved')
+            keywords = spec['keywords'] if spec['keywords'] is not None else self._default_keywords
+            matcher, triage, decisions = self._scoring_for(keywords, self._important_authors(spec['authors'],
+                                                                                            starting_papers))
+            triage = triage if spec['triage'] else None
+            walk_surf = partial(main.surf, matcher=matcher, decisions=decisions, cr=None, back_to_start_weight=0.15,
+                                triage=triage, titles=main.get_titles(), papers=self._papers)
+            make_prefetcher = None
+            if main.PREFETCH_WORKERS:
+                make_prefetcher = partial(Prefetcher, self._papers.fetch_paper, max_workers=main.PREFETCH_WORKERS,
+                                          max_queued=main.PREFETCH_QUEUE, order=triage.ranked_DOIs if triage else None,
+                                          decided=decisions.get)
+            pool = WalkerPool(walk_surf, starting_papers, matcher, n_walkers=spec['walkers'], seed=spec['seed'],
+                              make_prefetcher=make_prefetcher, sink=job, verbose=self._verbose)
+            if not job.running(pool):
+                for walker in pool.get_walkers():
+                    walker.close()
+                job.finish()
+                return
+            steps, monitor = spec['steps'], None
+            if spec['stop'] == 'converge':
+                steps = spec['max_steps']
+                monitor = ConvergenceMonitor(every=main.CONVERGE_EVERY, top_k=main.CONVERGE_TOP_K,
+                                             overlap=main.CONVERGE_OVERLAP, discovery=main.CONVERGE_DISCOVERY,
+                                             patience=main.CONVERGE_PATIENCE, max_seconds=spec['max_seconds'])
+            with metrics.timer('service.walk'):
+                result = pool.run(steps, monitor=monitor)
+            job.finish(result.paper_counter)
+        except Exception as error:
+            print(f"Job {job.get_id()} failed: {error}")
+            metrics.count('service.jobs_failed')
+            job.finish(error=error)
+        finally:
+            if renew_doi_table(self._max_dois):
+                metrics.count('service.doi_tables')
+
+    def close(self):
+        for job in self.get_jobs():
+            job.cancel()
+        self._executor.shutdown(wait=True)
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _job(self, job_id):
+            job = service.get_job(job_id)
+            if job is None:
+                self._send_json(404, {'error': f"No job {job_id}"})
+            return job
+
+        def _parts(self):
+            url = urlsplit(self.path)
+            return [part for part in url.path.split('/') if part], parse_qs(url.query)
+
+        def do_GET(self):
+            parts, params = self._parts()
+            if parts == ['status']:
+                self._send_json(200, service.get_status())
+            elif parts == ['jobs']:
+                self._send_json(200, [job.summary(ranking=False) for job in service.get_jobs()])
+            elif len(parts) == 2 and parts[0] == 'jobs':
+                job = self._job(parts[1])
+                if job:
+                    self._send_json(200, job.summary())
+            elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'events':
+                job = self._job(parts[1])
+                try:
+                    since = int(params.get('since', ['0'])[0])
+                except ValueError:
+                    since = -1
+                if job and since < 0:
+                    self._send_json(400, {'error': 'since must be a non-negative integer'})
+                elif job:
+                    self._stream(job, since)
+            else:
+                self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+        def _stream(self, job, since):
+            #No Content-Length: the stream ends when the job does and the connection closes
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.end_headers()
+            try:
+                for event in job.stream(since):
+                    self.wfile.write((json.dumps(event) + '\n').encode('utf-8'))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self.close_connection = True
+
+        def do_POST(self):
+            parts, _ = self._parts()
+            if parts != ['jobs']:
+                self._send_json(404, {'error': f"Unknown path {self.path}"})
+                return
+            try:
+                spec = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'null')
+                job = service.submit(spec)
+            except ValueError as error:
+                self._send_json(400, {'error': str(error)})
+                return
+            self._send_json(202, job.summary(ranking=False))
+
+        def do_DELETE(self):
+            parts, _ = self._parts()
+            if len(parts) != 2 or parts[0] != 'jobs':
+                self._send_json(404, {'error': f"Unknown path {self.path}"})
+                return
+            job = self._job(parts[1])
+            if job:
+                job.cancel()
+                self._send_json(200, job.summary(ranking=False))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ThreadingHTTPServer on a Unix socket, reachable only through the file system"""
+    daemon_threads = True
+
+def make_server(service, host = main.SERVICE_HOST, port = main.SERVICE_PORT, socket_path = None):
+    if socket_path:
+        #A socket left behind by a previous service would make bind() fail
+        if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.remove(socket_path)
+        return UnixHTTPServer(socket_path, make_handler(service))
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+def parse_args(argv = None):
+    parser = argparse.ArgumentParser(description='Serve surf jobs over local HTTP with warm state between them')
+    parser.add_argument('--host', default=main.SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=main.SERVICE_PORT)
+    parser.add_argument('--socket', default=None, help='listen on this Unix socket instead of host:port')
+    parser.add_argument('--max-jobs', type=int, default=main.SERVICE_MAX_JOBS, help='jobs running at once')
+    parser.add_argument('--max-papers', type=int, default=main.SERVICE_MAX_PAPERS, help='papers kept in memory')
+    parser.add_argument('--max-matchers', type=int, default=main.SERVICE_MAX_MATCHERS,
+                        help='keyword/author sets whose scores are kept in memory')
+    parser.add_argument('--keywords', default=main.KEYWORDS, help='default keywords for jobs')
+    parser.add_argument('--important-authors', default=main.IMPORTANT_AUTHORS, help='default important authors for jobs')
+    parser.add_argument('--abx-colours', default=main.ABX_COLOURS)
+    parser.add_argument('--cache', default=main.CACHE_PATH, help='metadata cache (SQLite)')
+    parser.add_argument('--cache-only', action='store_true', default=main.CACHE_ONLY, help='never go to the network')
+    parser.add_argument('--metrics', default=main.METRICS_PATH, help='JSON snapshot of timings and counters')
+    parser.add_argument('--max-dois', type=int, default=main.SERVICE_MAX_DOIS,
+                        help='reference DOIs interned before the table is started afresh')
+    parser.add_argument('--quiet', action='store_true', help="drop the walkers' per-step output")
+    return parser.parse_args(argv)
+
+def serve(argv = None):
+    args = parse_args(argv)
+    main.open_cache(args.cache, cache_only=args.cache_only)
+    if args.quiet:
+        main.VERBOSE = False
+    atexit.register(main.report_metrics, args.metrics)
+    if args.metrics:
+        metrics.start_export(args.metrics, every=main.METRICS_EVERY)
+    abx_list, abx_colours = main.read_abx_colours(args.abx_colours)
+    service = SurfService(main.read_keywords(args.keywords), main.read_important_authors(args.important_authors),
+                          abx_list, abx_colours, max_jobs=args.max_jobs, max_papers=args.max_papers,
+                          max_matchers=args.max_matchers, max_dois=args.max_dois, verbose=main.VERBOSE)
+    server = make_server(service, args.host, args.port, args.socket)
+    print(f"Serving surf jobs on {args.socket or f'http://{args.host}:{server.server_address[1]}'}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+if __name__ == '__main__':
+    serve()
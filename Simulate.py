@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Simulate.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Vectorized random walks over a snapshot's CSR arrays, many walkers per NumPy step"""
+
+from random import Random
+
+import numpy as np
+
+#Same as surf(): references tried per step before giving up and jumping
+MAX_ATTEMPTS = 10
+
+def node_scores(graph, matcher):
+    """Total matcher score of every node in the snapshot, NaN where fetch_paper would find nothing (unfetchable)"""
+    scores = np.full(len(graph), np.nan)
+    for node_id in range(len(graph)):
+        paper = graph.make_paper(node_id, with_references=False)
+        if paper is not None:
+            scores[node_id] = matcher.scores(paper)[0]
+    return scores
+
+class BatchSimulator:
+    """Advances n_walkers walkers in lock step with the transition rules of surf() and Walker.step():
+
+    - no references: jump uniformly to a starting or already seen paper
+    - with probability back_to_start_weight: jump uniformly to a starting paper
+    - otherwise try up to MAX_ATTEMPTS random references, skipping DOI-less and unfetchable ones;
+      move to the first usable one if it is a starting paper or scores above low_score, else
+      (low score) jump uniformly to a starting or seen paper; after MAX_ATTEMPTS misses, jump too
+    - a paper without references is not kept as the pointer; the walker continues from a random
+      seen (or starting) paper instead
+
+    Every step counts a visit to the paper moved to unless it is a starting paper, and moves that
+    are not jumps add an edge. Unlike the threaded walkers, all walkers share one set of seen
+    papers, which only changes where fallback jumps can land.
+    """
+    def __init__(self, graph, scores, starting_ids, back_to_start_weight = 0.15, low_score = 10,
+                 n_walkers = 10000, seed = None):
+        self._graph = graph
+        self._offsets = np.asarray(graph.get_offsets())
+        self._refs = np.asarray(graph.get_refs())
+        n = len(graph)
+        self._n = n
+        self._degree = np.diff(self._offsets)
+        self._usable = ~np.isnan(scores)
+        self._starting = np.asarray(starting_ids, dtype=np.int64)
+        if not len(self._starting):
+            raise ValueError('No starting papers in the snapshot')
+        self._is_start = np.zeros(n, dtype=bool)
+        self._is_start[self._starting] = True
+        self._accept = self._is_start | (self._usable & (np.nan_to_num(scores, nan=-np.inf) > low_score))
+        self._back_to_start_weight = back_to_start_weight
+        self._rng = np.random.default_rng(Random(seed).getrandbits(64) if seed is not None else None)
+        self._seen = np.zeros(n, dtype=bool)
+        self._seen_list = np.empty(n, dtype=np.int64)
+        self._n_seen = 0
+        self._counts = np.zeros(n, dtype=np.int64)
+        self._edge_codes = []
+        self._edges = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        self._pending_visits = []
+        self._pending = 0
+        self._steps = 0
+        self._pointer = self._rng.choice(self._starting, size=n_walkers)
+
+    def get_steps(self):
+        return self._steps
+
+    def _random_known(self, size):
+        """Uniform over starting papers and seen papers, like choice_from(rng, starting, seen)"""
+        n_start = len(self._starting)
+        position = self._rng.integers(0, n_start + self._n_seen, size=size)
+        in_start = position < n_start
+        return np.where(in_start, self._starting[np.minimum(position, n_start - 1)],
+                        self._seen_list[np.maximum(position - n_start, 0)])
+
+    def _random_seen_or_start(self, size):
+        if self._n_seen:
+            return self._seen_list[self._rng.integers(0, self._n_seen, size=size)]
+        return self._starting[self._rng.integers(0, len(self._starting), size=size)]
+
+    def step(self):
+        pointer = self._pointer
+        n_walkers = len(pointer)
+        degree = self._degree[pointer]
+        new = np.empty(n_walkers, dtype=np.int64)
+        jumped = np.ones(n_walkers, dtype=bool)
+
+        no_references = degree == 0
+        teleport = ~no_references & (self._rng.random(n_walkers) < self._back_to_start_weight)
+        walking = ~no_references & ~teleport
+
+        #All attempts are drawn at once; the first usable reference wins
+        rows = np.flatnonzero(walking)
+        picks = (self._rng.random((len(rows), MAX_ATTEMPTS)) * degree[rows, None]).astype(np.int64)
+        candidates = self._refs[self._offsets[pointer[rows], None] + picks]
+        usable = (candidates >= 0) & self._usable[np.maximum(candidates, 0)]
+        found = usable.any(axis=1)
+        target = candidates[np.arange(len(rows)), usable.argmax(axis=1)]
+        accepted = found & self._accept[np.maximum(target, 0)]
+
+        moved = rows[accepted]
+        new[moved] = target[accepted]
+        jumped[moved] = False
+        teleporting = np.flatnonzero(teleport)
+        new[teleporting] = self._starting[self._rng.integers(0, len(self._starting), size=len(teleporting))]
+        fallback = np.concatenate([np.flatnonzero(no_references), rows[~accepted]])
+        new[fallback] = self._random_known(len(fallback))
+
+        self._record(pointer, new, jumped)
+        #Papers without references do not become the pointer
+        dead_end = self._degree[new] == 0
+        self._pointer = new
+        self._pointer[dead_end] = self._random_seen_or_start(int(dead_end.sum()))
+        self._steps += 1
+
+    def _record(self, pointer, new, jumped):
+        visited = new[~self._is_start[new]]
+        unseen = np.unique(visited[~self._seen[visited]])
+        self._seen[unseen] = True
+        self._seen_list[self._n_seen:self._n_seen + len(unseen)] = unseen
+        self._n_seen += len(unseen)
+        self._pending_visits.append(visited)
+        self._edge_codes.append(pointer[~jumped] * self._n + new[~jumped])
+        self._pending += len(pointer)
+        if self._pending >= 1 << 22:
+            self._flush()
+
+    def _flush(self):
+        if self._pending_visits:
+            self._counts += np.bincount(np.concatenate(self._pending_visits), minlength=self._n)
+            self._pending_visits = []
+        if self._edge_codes:
+            codes, multiplicity = np.unique(np.concatenate(self._edge_codes), return_counts=True)
+            old_codes, old_multiplicity = self._edges
+            merged, inverse = np.unique(np.concatenate([old_codes, codes]), return_inverse=True)
+            self._edges = (merged, np.bincount(inverse, weights=np.concatenate([old_multiplicity, multiplicity]),
+                                               minlength=len(merged)).astype(np.int64))
+            self._edge_codes = []
+        self._pending = 0
+
+    def run(self, steps):
+        for _ in range(steps):
+            self.step()
+        self._flush()
+        return self._counts
+
+    def get_counts(self):
+        """Visits per node id"""
+        self._flush()
+        return self._counts
+
+    def get_edges(self):
+        """(source ids, target ids, multiplicities) of every non-jump move"""
+        self._flush()
+        codes, multiplicity = self._edges
+        return codes // self._n, codes % self._n, multiplicity
+
+    def get_ranking(self, top = None):
+        """Paper -> visits, most visited first, for write_output"""
+        counts = self.get_counts()
+        visited = np.flatnonzero(counts)
+        order = visited[np.argsort(-counts[visited], kind='stable')]
+        if top is not None:
+            order = order[:top]
+        return {self._graph.make_paper(node_id, with_references=False): int(counts[node_id]) for node_id in order}
+
+    def fill_result(self, result, matcher, top = None):
+        """Copies the top most visited papers (and the moves between them) into a WalkResult, so
+        the ranking, DAG and render stages work as after a threaded walk. Depths are shortest
+        move distances from the starting papers."""
+        ranking = self.get_ranking(top)
+        papers = {self._graph.get_id(paper.get_DOI()): paper for paper in ranking}
+        for node_id in self._starting.tolist():
+            if node_id not in papers:
+                papers[node_id] = self._graph.make_paper(node_id, with_references=False)
+        names = {node_id: paper.make_name() for node_id, paper in papers.items() if paper is not None}
+        result.paper_counter.update(ranking)
+        graph = result.graph
+        for node_id, name in names.items():
+            graph.add_node(name, matcher.colours(papers[node_id]), start=bool(self._is_start[node_id]))
+            if not self._is_start[node_id]:
+                graph.add_visits(name, int(self._counts[node_id]))
+
+        sources, targets, multiplicity = self.get_edges()
+        kept = np.isin(sources, list(names)) & np.isin(targets, list(names))
+        children = dict()
+        for source, target, n in zip(sources[kept].tolist(), targets[kept].tolist(), multiplicity[kept].tolist()):
+            children.setdefault(source, []).append(target)
+            graph.add_edge(names[target], names[source], n)
+
+        #Edges arrive in no particular order, so depths are worked out breadth first
+        depth = {node_id: 0 for node_id in self._starting.tolist() if node_id in names}
+        frontier = list(depth)
+        while frontier:
+            following = []
+            for node_id in frontier:
+                for child in children.get(node_id, ()):
+                    if child not in depth:
+                        depth[child] = depth[node_id] + 1
+                        following.append(child)
+            frontier = following
+        for node_id, level in depth.items():
+            graph.set_depth(names[node_id], level)
+        return result
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Snapshot.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Offline citation graph: a bulk dump imported once into memory-mapped CSR arrays
+
+Usage: python Snapshot.py OUT_DIR DUMP.jsonl[.gz] [DUMP.jsonl[.gz] ...]
+
+Each dump line is either a Crossref work (optionally wrapped as {"message": {...}}) or an
+OpenCitations-style citation {"citing": DOI, "cited": DOI}. OUT_DIR then holds:
+
+    dois.bin, doi_offsets.npy   sorted canonical DOIs (node id = position)
+    offsets.npy, refs.npy       CSR adjacency: references of node i are refs[offsets[i]:offsets[i + 1]],
+                                in the order listed, -1 for references without a DOI
+    meta.bin, meta_offsets.npy  per-node JSON metadata (title, authors, year), empty if unknown
+    manifest.json
+"""
+
+from array import array
+import argparse
+from bisect import bisect_left
+import gzip
+import json
+import mmap
+import os
+
+import numpy as np
+
+from Crossref import publication_year
+from DOI import canonical_doi
+from Paper import Paper
+
+VERSION = 1
+
+def _open(path):
+    return gzip.open(path, 'rt', encoding='utf-8') if path.endswith('.gz') else open(path, 'r', encoding='utf-8')
+
+def _work_metadata(message):
+    title = message.get('title')
+    authors = [author.get('family') for author in message.get('author') or [] if isinstance(author, dict)]
+    return {'title': title[0] if isinstance(title, list) and title else title or None,
+            'author': authors or None,
+            'year': publication_year(message)}
+
+class _Builder:
+    """Accumulates nodes and edges with provisional ids in arrival order"""
+    def __init__(self):
+        self.ids = dict()
+        self.metadata = dict()
+        self.sources = array('q')
+        self.targets = array('q')
+        self.works = set()
+
+    def node(self, doi):
+        node_id = self.ids.get(doi)
+        if node_id is None:
+            node_id = self.ids[doi] = len(self.ids)
+        return node_id
+
+    def add_work(self, message):
+        doi = canonical_doi(message.get('DOI') or '')
+        if not doi or doi in self.works:
+            return
+        self.works.add(doi)
+        source = self.node(doi)
+        self.metadata[source] = json.dumps(_work_metadata(message), separators=(',', ':'))
+        for reference in message.get('reference') or []:
+            reference_doi = canonical_doi(reference.get('DOI') or '')
+            self.sources.append(source)
+            self.targets.append(self.node(reference_doi) if reference_doi else -1)
+
+    def add_citation(self, citing, cited):
+        citing, cited = canonical_doi(citing or ''), canonical_doi(cited or '')
+        if citing and cited:
+            self.sources.append(self.node(citing))
+            self.targets.append(self.node(cited))
+
+    def add_line(self, line):
+        record = json.loads(line)
+        if 'citing' in record:
+            self.add_citation(record.get('citing'), record.get('cited'))
+        else:
+            self.add_work(record.get('message', record))
+
+def _write_strings(strings, path, offsets_path):
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    with open(path, 'wb') as file:
+        position = 0
+        for i, text in enumerate(strings):
+            data = text.encode('utf-8')
+            file.write(data)
+            position += len(data)
+            offsets[i + 1] = position
+    np.save(offsets_path, offsets)
+
+def build_snapshot(dump_paths, out_dir):
+    """Imports the dumps into out_dir and returns the number of nodes and edges"""
+    builder = _Builder()
+    for path in dump_paths:
+        with _open(path) as file:
+            for line in file:
+                if line.strip():
+                    builder.add_line(line)
+        print(f"Imported {path}: {len(builder.ids)} nodes, {len(builder.sources)} edges so far")
+
+    #Final ids follow DOI order, so lookups can binary search the memory-mapped DOI table
+    dois = sorted(builder.ids)
+    final = np.empty(len(dois), dtype=np.int64)
+    for node_id, doi in enumerate(dois):
+        final[builder.ids[doi]] = node_id
+    sources = final[np.frombuffer(builder.sources, dtype=np.int64)] if builder.sources else np.empty(0, dtype=np.int64)
+    targets = np.frombuffer(builder.targets, dtype=np.int64)
+    targets = np.where(targets >= 0, final[np.maximum(targets, 0)], -1) if len(targets) else targets
+    #Stable, so each paper keeps its references in the order they were listed
+    order = np.argsort(sources, kind='stable')
+    offsets = np.zeros(len(dois) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(dois)), out=offsets[1:])
+
+    os.makedirs(out_dir, exist_ok=True)
+    _write_strings(dois, os.path.join(out_dir, 'dois.bin'), os.path.join(out_dir, 'doi_offsets.npy'))
+    np.save(os.path.join(out_dir, 'offsets.npy'), offsets)
+    np.save(os.path.join(out_dir, 'refs.npy'), targets[order].astype(np.int64))
+    metadata = [''] * len(dois)
+    for provisional, text in builder.metadata.items():
+        metadata[final[provisional]] = text
+    _write_strings(metadata, os.path.join(out_dir, 'meta.bin'), os.path.join(out_dir, 'meta_offsets.npy'))
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as file:
+        json.dump({'version': VERSION, 'nodes': len(dois), 'edges': int(len(targets)),
+                   'works': len(builder.works), 'sources': list(dump_paths)}, file, indent=2)
+    return len(dois), int(len(targets))
+
+def _map(path):
+    """Read-only memory map of a file (None if it is empty, which mmap cannot map)"""
+    if not os.path.getsize(path):
+        return None
+    with open(path, 'rb') as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+class SnapshotGraph:
+    """Read-only view of a snapshot directory; every array is memory mapped, so several
+    processes walking the same snapshot share one copy in the page cache.
+
+    Stands in for the Crossref/PubMed path: fetch_paper(doi) returns a Paper, or None for DOIs
+    that are not in the snapshot or only known as a citation target (no metadata, no references).
+    Nodes imported from citations alone have no metadata: lookup(doi), if given, may return their
+    Crossref work (e.g. from the metadata cache), otherwise they become papers without a title,
+    authors or year, which can be walked from but score nothing.
+    """
+    def __init__(self, path, lookup = None):
+        self._lookup = lookup
+        with open(os.path.join(path, 'manifest.json'), 'r', encoding='utf-8') as file:
+            self._manifest = json.load(file)
+        if self._manifest.get('version') != VERSION:
+            raise ValueError(f"Unsupported snapshot version {self._manifest.get('version')} in {path}")
+        self._dois = _map(os.path.join(path, 'dois.bin'))
+        self._doi_offsets = np.load(os.path.join(path, 'doi_offsets.npy'), mmap_mode='r')
+        self._offsets = np.load(os.path.join(path, 'offsets.npy'), mmap_mode='r')
+        self._refs = np.load(os.path.join(path, 'refs.npy'), mmap_mode='r')
+        self._meta = _map(os.path.join(path, 'meta.bin'))
+        self._meta_offsets = np.load(os.path.join(path, 'meta_offsets.npy'), mmap_mode='r')
+
+    def __len__(self):
+        return self._manifest['nodes']
+
+    def get_manifest(self):
+        return self._manifest
+
+    def get_DOI(self, node_id):
+        return self._dois[self._doi_offsets[node_id]:self._doi_offsets[node_id + 1]].decode('utf-8')
+
+    def get_id(self, doi):
+        doi = canonical_doi(doi or '')
+        if not doi:
+            return None
+        node_id = bisect_left(range(len(self)), doi, key=self.get_DOI)
+        if node_id < len(self) and self.get_DOI(node_id) == doi:
+            return node_id
+        return None
+
+    def __contains__(self, doi):
+        return self.get_id(doi) is not None
+
+    def get_reference_ids(self, node_id):
+        return self._refs[self._offsets[node_id]:self._offsets[node_id + 1]]
+
+    def get_metadata(self, node_id):
+        start, end = self._meta_offsets[node_id], self._meta_offsets[node_id + 1]
+        if start == end:
+            return None
+        return json.loads(self._meta[start:end])
+
+    def get_offsets(self):
+        return self._offsets
+
+    def get_refs(self):
+        return self._refs
+
+    def make_paper(self, node_id, with_references = True):
+        doi = self.get_DOI(node_id)
+        metadata = self.get_metadata(node_id)
+        if metadata is None and self._lookup is not None:
+            message = self._lookup(doi)
+            if message:
+                metadata = _work_metadata(message)
+        reference_ids = self.get_reference_ids(node_id)
+        if metadata is None:
+            if not len(reference_ids):
+                return None
+            metadata = dict()
+        references = None
+        if with_references:
+            references = [{'DOI': self.get_DOI(reference_id)} if reference_id >= 0 else {}
+                          for reference_id in reference_ids.tolist()]
+        title = metadata.get('title')
+        return Paper(DOI=doi,
+                     title=[title] if title else None,
+                     author=[{'family': name} for name in metadata['author']] if metadata.get('author') else None,
+                     year=metadata.get('year'),
+                     references=references)
+
+    def fetch_paper(self, doi):
+        node_id = self.get_id(doi)
+        if node_id is None:
+            return None
+        return self.make_paper(node_id)
+
+def main():
+    parser = argparse.ArgumentParser(description='Import citation dumps into an offline snapshot')
+    parser.add_argument('out_dir')
+    parser.add_argument('dumps', nargs='+', help='Crossref works or OpenCitations citations, JSONL (optionally .gz)')
+    args = parser.parse_args()
+    nodes, edges = build_snapshot(args.dumps, args.out_dir)
+    print(f"Snapshot written to {args.out_dir}: {nodes} nodes, {edges} edges")
+
+if __name__ == '__main__':
+    main()
@@ -38,12 +38,23 @@ class LowScorePaper(SurfAction):
         super().__init__(is_back_to_start=True)
 
 class SurfWrapper(): 
-    def __init__(self, paper: Paper, action: SurfAction): 
+    def __init__(self, paper: Paper, action: SurfAction, score: float = None, candidate: Paper = None): 
         self._paper = paper
         self._action = action
+        self._score = score
+        self._candidate = candidate
     
     def is_back_to_start(self): 
         return self._action.is_back_to_start()
     
     def get_paper(self): 
-        return self._paper
\ No newline at end of file
+        return self._paper
+
+    def get_action(self):
+        return self._action
+
+    def get_score(self):
+        return self._score
+
+    def get_candidate(self):
+        return self._candidate
\ No newline at end of file
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Titles.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Title fingerprint index: finds the DOI of a reference that was listed without one"""
+
+from collections import OrderedDict
+import re
+import sys
+import threading
+
+from unidecode import unidecode
+
+from DOI import canonical_doi
+from Metrics import metrics
+
+#Titles of fewer words are too generic ('Editorial', 'Antibiotic resistance') to match on alone
+MIN_TITLE_WORDS = 4
+
+_WORD = re.compile(r'[a-z0-9]+')
+_YEAR = re.compile(r'1[5-9]\d\d|20\d\d')
+
+def title_fingerprint(title):
+    """Lower-case ASCII words of a title joined by single spaces, None if there are none.
+    Case, accents, punctuation and spacing differences between listings of a title disappear."""
+    if not title:
+        return None
+    return ' '.join(_WORD.findall(unidecode(title).lower())) or None
+
+def author_key(author):
+    """Words of an author's name as Crossref lists it ('Smith', 'Smith J.', 'J. Smith'), initials
+    dropped, None if there are none"""
+    if not author or not isinstance(author, str):
+        return None
+    return ' '.join(word for word in _WORD.findall(unidecode(author).lower()) if len(word) > 1) or None
+
+def year_of(year):
+    """Year as an int from an int or a string such as '1998a', None if there is none"""
+    if isinstance(year, int):
+        return year
+    match = _YEAR.search(str(year)) if year else None
+    return int(match.group(0)) if match else None
+
+def _consistent(entry_author, entry_year, author_words, year):
+    """False if a known author or year contradicts the entry, else how many of the two confirm it"""
+    confirmed = 0
+    if entry_year is not None and year is not None:
+        if abs(entry_year - year) > 1:
+            return False
+        confirmed += 1
+    if entry_author and author_words:
+        if not author_words.intersection(entry_author.split()):
+            return False
+        confirmed += 1
+    return confirmed
+
+class TitleIndex:
+    """Maps title fingerprints to the DOIs of works seen in this run or, with a cache, any earlier one.
+
+    Every paper made, and every reference with a DOI that it lists, is added under the fingerprint
+    of its title with its first author and year. With a cache the rows are only written there, and
+    memory keeps the max_titles fingerprints last looked up; without one, memory keeps the
+    max_titles fingerprints last added or looked up. resolve() matches a reference without a DOI
+    locally first: the title must match exactly and a listed first author or year (give or take
+    one) must not contradict the work. Otherwise, and for references that are only a free-text
+    citation, lookup(text) is asked for candidate works as (DOI, title, author, year) tuples, or
+    None if it cannot answer now; a candidate is only taken when its title matches the reference.
+    At most max_lookups searches are made, and their outcomes (found or not) are cached.
+    """
+    def __init__(self, cache = None, lookup = None, max_lookups = 200, max_titles = 50000):
+        self._cache = cache
+        self._lookup = lookup
+        self._remaining = max_lookups
+        self._max_titles = max_titles
+        self._titles = OrderedDict()
+        self._searched = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._titles)
+
+    def _keep(self, table, key, value):
+        """Stores value under key as the most recent of the table's max_titles entries; call with the lock held"""
+        table[key] = value
+        table.move_to_end(key)
+        while len(table) > self._max_titles:
+            table.popitem(last=False)
+
+    def _add(self, doi, title, author, year):
+        """The new (fingerprint, doi, author, year) row, None if it is known or unusable"""
+        fingerprint = title_fingerprint(title)
+        doi = canonical_doi(doi)
+        if not fingerprint or not doi:
+            return None
+        #The same titles and surnames recur across many reference lists
+        fingerprint = sys.intern(fingerprint)
+        author = author_key(author)
+        entry = (sys.intern(author) if author else None, year_of(year))
+        with self._lock:
+            entries = self._titles.get(fingerprint)
+            if entries is not None:
+                if doi in entries:
+                    return None
+                entries[doi] = entry
+            #Fingerprints held with a cache are complete copies of its rows, so others are left to it
+            elif self._cache is None:
+                self._keep(self._titles, fingerprint, {doi: entry})
+        return (fingerprint, doi) + entry
+
+    def _persist(self, rows, source = None):
+        rows = [row for row in rows if row]
+        if rows and self._cache:
+            self._cache.put_titles(rows, source)
+
+    def add(self, doi, title, author = None, year = None):
+        self._persist([self._add(doi, title, author, year)])
+
+    def add_paper(self, paper):
+        """Indexes a paper and the references it lists with a DOI and an inline title"""
+        rows = [self._add(paper.get_DOI(), paper.get_title(), paper.get_first_author(), paper.get_year())]
+        for reference in paper.get_references():
+            if reference.get_DOI() and reference.get_title():
+                rows.append(self._add(reference.get_DOI(), reference.get_title(), reference.get_first_author(),
+                                      reference.get_year()))
+        self._persist(rows, paper.get_DOI())
+
+    def _entries(self, fingerprint):
+        with self._lock:
+            entries = self._titles.get(fingerprint)
+            if entries is not None:
+                self._titles.move_to_end(fingerprint)
+                return list(entries.items())
+        if self._cache is None:
+            return []
+        rows = self._cache.get_titles(fingerprint)
+        with self._lock:
+            entries = self._titles.get(fingerprint)
+            if entries is None:
+                entries = {doi: (author, year) for doi, author, year in rows}
+                self._keep(self._titles, sys.intern(fingerprint), entries)
+            return list(entries.items())
+
+    def match(self, title, author = None, year = None):
+        """DOI of the one known work with this title that author and year do not contradict, else None"""
+        fingerprint = title_fingerprint(title)
+        if not fingerprint:
+            return None
+        author_words = set((author_key(author) or '').split())
+        year = year_of(year)
+        short = len(fingerprint.split()) < MIN_TITLE_WORDS
+        matches = dict()
+        for doi, (entry_author, entry_year) in self._entries(fingerprint):
+            confirmed = _consistent(entry_author, entry_year, author_words, year)
+            if confirmed is False or (short and not confirmed):
+                continue
+            matches[doi] = confirmed
+        if not matches:
+            return None
+        best = max(matches.values())
+        dois = [doi for doi, confirmed in matches.items() if confirmed == best]
+        if len(dois) > 1:
+            metrics.count('titles.ambiguous')
+            return None
+        return dois[0]
+
+    def _verify(self, candidates, fingerprint, text, author_words, year):
+        """First candidate whose title is the reference's (or, for a free-text citation, appears in it)"""
+        for doi, title, author, candidate_year in candidates:
+            candidate = title_fingerprint(title)
+            if not candidate:
+                continue
+            if fingerprint:
+                if candidate != fingerprint:
+                    continue
+            elif len(candidate.split()) < MIN_TITLE_WORDS or f" {candidate} " not in f" {text} ":
+                continue
+            if _consistent(author_key(author), year_of(candidate_year), author_words, year) is not False:
+                return canonical_doi(doi)
+        return None
+
+    def search(self, reference):
+        """DOI from a bibliographic lookup of the reference, None if it found nothing or was not made"""
+        fingerprint = title_fingerprint(reference.get_title())
+        if fingerprint:
+            text = ' '.join(str(part) for part in (reference.get_title(), reference.get_first_author(),
+                                                   reference.get_year()) if part)
+        else:
+            text = reference.get_unstructured()
+        query = title_fingerprint(text)
+        if not query or len((fingerprint or query).split()) < MIN_TITLE_WORDS:
+            return None
+        with self._lock:
+            if query in self._searched:
+                self._searched.move_to_end(query)
+                return self._searched[query]
+        if self._cache:
+            found, doi = self._cache.get_title_lookup(query)
+            if found:
+                metrics.count('titles.search.cached')
+                with self._lock:
+                    self._keep(self._searched, query, doi)
+                return doi
+        if self._lookup is None or (self._cache and self._cache.is_cache_only()):
+            return None
+        with self._lock:
+            if self._remaining is not None and self._remaining <= 0:
+                metrics.count('titles.search.over_budget')
+                return None
+            if self._remaining is not None:
+                self._remaining -= 1
+        with metrics.timer('stage.title_search'):
+            candidates = self._lookup(text)
+        #The service could not be asked, so nothing is remembered and the budget is returned
+        if candidates is None:
+            with self._lock:
+                if self._remaining is not None:
+                    self._remaining += 1
+            return None
+        self._persist([self._add(*candidate) for candidate in candidates])
+        if fingerprint:
+            author_words, year = set((author_key(reference.get_first_author()) or '').split()), year_of(reference.get_year())
+        else:
+            #A free-text citation names its authors somewhere; its numbers are too ambiguous to read a year from
+            author_words, year = set(query.split()), None
+        doi = self._verify(candidates, fingerprint, query, author_words, year)
+        metrics.count(f"titles.search.{'hit' if doi else 'miss'}")
+        with self._lock:
+            self._keep(self._searched, query, doi)
+        if self._cache:
+            self._cache.put_title_lookup(query, doi)
+        return doi
+
+    def resolve(self, reference):
+        """DOI of a reference listed without one: from the index, else from a search, else None"""
+        doi = self.match(reference.get_title(), reference.get_first_author(), reference.get_year())
+        if doi:
+            metrics.count('titles.local')
+            return doi
+        doi = self.search(reference)
+        if not doi:
+            metrics.count('titles.unresolved')
+        return doi
+
+    def can_resolve(self, reference):
+        """Whether there is a title or free-text citation to go by"""
+        return bool(reference.get_title() or reference.get_unstructured())
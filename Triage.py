@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Triage.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Pre-fetch triage of references from the metadata Crossref lists inline with them"""
+
+from collections import OrderedDict
+import threading
+
+from Metrics import metrics
+
+PROMISING = 'promising'
+IRRELEVANT = 'irrelevant'
+UNKNOWN = 'unknown'
+
+class ReferenceTriage:
+    """Weights a paper's references for selection before anything is fetched.
+
+    A reference's inline title and first author are scored with the matcher's rules (the last
+    author is not listed inline, so this can only undercount). Above low_score it is promising
+    and weighs promising_weight; a title that matches nothing, by an author who matches nothing,
+    is clearly irrelevant and weighs irrelevant_weight (0 never picks it); anything else,
+    including references without inline metadata, weighs 1. References without a DOI are never
+    picked unless a titles index (Titles.TitleIndex) may resolve them. Weights are kept for the
+    max_papers most recent papers.
+    """
+    def __init__(self, matcher, low_score = 10, promising_weight = 4.0, irrelevant_weight = 0.1,
+                 max_papers = 10000, titles = None):
+        self._matcher = matcher
+        self._titles = titles
+        self._low_score = low_score
+        self._weights = {PROMISING: promising_weight, IRRELEVANT: irrelevant_weight, UNKNOWN: 1.0}
+        self._max_papers = max_papers
+        self._papers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def classify(self, reference):
+        """PROMISING, IRRELEVANT or UNKNOWN from the reference's inline metadata alone"""
+        author_score = self._matcher.author_score(reference)
+        if not reference.get_title():
+            return PROMISING if author_score > self._low_score else UNKNOWN
+        title_score = self._matcher.title_score(reference)
+        score = 3 * title_score + author_score
+        if score > self._low_score:
+            return PROMISING
+        if not score:
+            return IRRELEVANT
+        return UNKNOWN
+
+    def _triage(self, paper):
+        """(classes, cumulative weights) of the paper's references, in reference order"""
+        key = paper.get_DOI()
+        with self._lock:
+            triaged = self._papers.get(key)
+            if triaged is not None:
+                self._papers.move_to_end(key)
+                return triaged
+        classes = []
+        cumulative = []
+        total = 0.0
+        for reference in paper.get_references():
+            pickable = reference.get_DOI() or (self._titles is not None and self._titles.can_resolve(reference))
+            kind = self.classify(reference) if pickable else None
+            classes.append(kind)
+            total += self._weights[kind] if kind else 0.0
+            cumulative.append(total)
+        triaged = (classes, cumulative)
+        with self._lock:
+            self._papers[key] = triaged
+            while len(self._papers) > self._max_papers:
+                self._papers.popitem(last=False)
+        return triaged
+
+    def choose(self, paper, rng):
+        """A reference picked in proportion to its weight, or None if none can be picked"""
+        classes, cumulative = self._triage(paper)
+        if not cumulative or not cumulative[-1]:
+            return None
+        position = rng.choices(range(len(cumulative)), cum_weights=cumulative)[0]
+        metrics.count(f"triage.{classes[position]}")
+        return paper.get_references()[position]
+
+    def weights(self, paper):
+        """Weight of each of the paper's references as choose() picks them, 0 for those it never picks"""
+        classes, _ = self._triage(paper)
+        return [self._weights[kind] if kind else 0.0 for kind in classes]
+
+    def ranked_DOIs(self, paper):
+        """DOIs of the references that can be picked, most promising first (for prefetching)"""
+        classes, _ = self._triage(paper)
+        dois = paper.get_reference_DOIs()
+        ranked = [(-self._weights[kind], position) for position, kind in enumerate(classes)
+                  if kind and self._weights[kind] and dois[position]]
+        return [dois[position] for _, position in sorted(ranked)]
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Walkers.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Independent surf walkers and a pool to run many of them"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from random import Random
+import threading
+
+from Graph import CitationGraph
+from Metrics import metrics
+from Registry import PaperRegistry
+
+class WalkResult:
+    """Visit counts (by Paper, for the ranking) and the walk graph collected by one or more walkers"""
+    #Part of checkpoint keys, so that a checkpoint of an older layout is not resumed into this one
+    VERSION = 2
+
+    def __init__(self):
+        self.paper_counter = dict()
+        self.graph = CitationGraph()
+
+    def merge(self, other):
+        for paper, count in other.paper_counter.items():
+            self.paper_counter[paper] = self.paper_counter.get(paper, 0) + count
+        #Shallowest depth wins so the result does not depend on merge order
+        self.graph.merge(other.graph)
+        return self
+
+class Walker:
+    """A single random surfer with its own RNG stream and its own record of seen papers.
+
+    surf is called as surf(current_paper, starting_papers, seen_papers, rng=rng) with two
+    PaperRegistry objects and must return a SurfWrapper; everything else it needs should already
+    be bound. With a
+    make_prefetcher factory, the walker also gets a Prefetcher (passed on to surf as prefetcher)
+    that resolves the references of the current paper and of its most visited papers. Each step
+    is announced on stdout unless verbose is False.
+    """
+    def __init__(self, surf, starting_papers, matcher, seed = None, name = 0,
+                 make_prefetcher = None, prefetch_top_every = 10, sink = None, verbose = True):
+        self._surf = surf
+        self._sink = sink
+        self._verbose = verbose
+        self._prefetcher = make_prefetcher() if make_prefetcher else None
+        self._prefetch_top_every = prefetch_top_every
+        self._steps = 0
+        self._starting_papers = starting_papers
+        self._matcher = matcher
+        self._rng = Random(seed)
+        self._name = name
+        self._seen_papers = PaperRegistry()
+        self._result = WalkResult()
+        for paper in starting_papers:
+            self._result.graph.add_node(paper.make_name(), matcher.colours(paper), start=True)
+        self._pointer = starting_papers.choice(self._rng)
+
+    def get_result(self):
+        return self._result
+
+    def get_steps(self):
+        return self._steps
+
+    def get_state(self):
+        return {'pointer': self._pointer,
+                'seen_papers': self._seen_papers,
+                'result': self._result,
+                'rng': self._rng.getstate(),
+                'steps': self._steps}
+
+    def set_state(self, state):
+        self._pointer = state['pointer']
+        self._seen_papers = state['seen_papers']
+        self._result = state['result']
+        self._rng.setstate(state['rng'])
+        self._steps = state['steps']
+
+    def step(self):
+        result = self._result
+        with metrics.timer('stage.surf_step'):
+            if self._prefetcher:
+                new_wrapped_paper = self._surf(self._pointer, self._starting_papers, self._seen_papers,
+                                               rng=self._rng, prefetcher=self._prefetcher)
+            else:
+                new_wrapped_paper = self._surf(self._pointer, self._starting_papers, self._seen_papers,
+                                               rng=self._rng)
+        metrics.count(f"action.{type(new_wrapped_paper.get_action()).__name__}")
+        new_paper = new_wrapped_paper.get_paper()
+        new_paper_name = new_paper.make_name()
+
+        #Colours only need working out the first time a paper turns up
+        colours = () if new_paper_name in result.graph else self._matcher.colours(new_paper)
+        #If current paper has been arrived at from another paper without jumping - add the edge from its parent
+        parent_name = None if new_wrapped_paper.is_back_to_start() else self._pointer.make_name()
+        counted = new_paper not in self._starting_papers
+        depth = result.graph.visit(new_paper_name, parent=parent_name, counted=counted, colours=colours)
+
+        #Keep track of how many times we have seen this paper
+        if counted:
+            if new_paper not in self._seen_papers:
+                result.paper_counter[new_paper] = 1
+                self._seen_papers.add(new_paper)
+            else:
+                result.paper_counter[new_paper] += 1
+
+        if self._sink:
+            self._sink.record(self._name, self._steps, self._pointer, new_wrapped_paper, depth, counted)
+
+        if new_paper.get_references():
+            self._pointer = new_paper
+        elif self._seen_papers:
+            self._pointer = self._seen_papers.choice(self._rng)
+        else:
+            self._pointer = self._starting_papers.choice(self._rng)
+
+        self._steps += 1
+        if self._prefetcher:
+            self._prefetch()
+
+    def _prefetch(self):
+        #The next pick is among the references of the current paper, so those go to the front of
+        #the queue; fetches still queued for earlier papers are unlikely to be used
+        self._prefetcher.cancel()
+        self._prefetcher.prefetch_paper(self._pointer, skip=self._seen_papers)
+        if self._steps % self._prefetch_top_every == 0:
+            self._prefetcher.prefetch_top(self._result.paper_counter, skip=self._seen_papers)
+
+    def walk(self, steps, stop = None):
+        """Takes up to steps steps, stopping early (between steps) once stop is set"""
+        if self._prefetcher:
+            self._prefetcher.prefetch_paper(self._pointer, skip=self._seen_papers)
+        for _ in range(steps):
+            if stop and stop.is_set():
+                break
+            if self._verbose:
+                print(f"walker {self._name} iteration {self._steps}")
+            self.step()
+        return self._result
+
+    def close(self):
+        if self._prefetcher:
+            self._prefetcher.close()
+
+class WalkerPool:
+    """Runs n_walkers independent walkers on a thread pool and merges their results.
+
+    Walkers spend most of their time waiting on Crossref and PubMed, so threads share one
+    metadata layer (cache, clients) without copying it into every worker. Walker i is
+    seeded from (seed, i), and results are merged in walker order, so a seeded run is
+    reproducible regardless of which walker finishes first.
+
+    With a Checkpointer, walkers advance in rounds of checkpointer.get_every() steps and the
+    state of every walker is saved between rounds and on Ctrl-C; resume() picks it up again.
+    With a ConvergenceMonitor, the merged ranking is checked between rounds and the walk ends
+    early once it has converged.
+    """
+    def __init__(self, surf, starting_papers, matcher, n_walkers = 4, seed = None,
+                 make_prefetcher = None, sink = None, verbose = True):
+        base = Random(seed)
+        self._walkers = [Walker(surf, starting_papers, matcher,
+                                seed=f"{seed}-{i}" if seed is not None else base.getrandbits(64),
+                                name=i, make_prefetcher=make_prefetcher, sink=sink, verbose=verbose)
+                         for i in range(n_walkers)]
+
+        self._stop = threading.Event()
+
+    def get_walkers(self):
+        return self._walkers
+
+    def get_state(self):
+        return [walker.get_state() for walker in self._walkers]
+
+    def set_state(self, state):
+        for walker, walker_state in zip(self._walkers, state):
+            walker.set_state(walker_state)
+
+    def get_counts(self):
+        """Merged paper_counter of all walkers so far"""
+        counts = dict()
+        for walker in self._walkers:
+            for paper, count in walker.get_result().paper_counter.items():
+                counts[paper] = counts.get(paper, 0) + count
+        return counts
+
+    def stop(self):
+        self._stop.set()
+
+    def _round(self, executor, steps_per_walker, round_steps):
+        futures = [executor.submit(walker.walk, min(round_steps, steps_per_walker - walker.get_steps()), self._stop)
+                   for walker in self._walkers]
+        try:
+            for future in futures:
+                future.result()
+        except BaseException:
+            #On Ctrl-C or a crash, let every walker finish the step it is on so the saved state is consistent
+            self._stop.set()
+            wait(futures)
+            raise
+
+    def get_steps(self):
+        return sum(walker.get_steps() for walker in self._walkers)
+
+    def run(self, steps_per_walker, result = None, checkpointer = None, extra_state = None, monitor = None):
+        """Walks until every walker has taken steps_per_walker steps (counting resumed ones), or
+        monitor says to stop, and merges the results.
+
+        extra_state is called with no arguments for anything else to store in each checkpoint.
+        """
+        result = result if result is not None else WalkResult()
+        round_steps = steps_per_walker
+        if checkpointer:
+            round_steps = min(round_steps, checkpointer.get_every())
+        if monitor:
+            round_steps = min(round_steps, monitor.get_every())
+            monitor.start()
+        try:
+            with ThreadPoolExecutor(max_workers=len(self._walkers)) as executor:
+                while not self._stop.is_set() and any(walker.get_steps() < steps_per_walker
+                                                      for walker in self._walkers):
+                    try:
+                        self._round(executor, steps_per_walker, round_steps)
+                    finally:
+                        if checkpointer:
+                            checkpointer.save({'walkers': self.get_state(),
+                                               'extra': extra_state() if extra_state else None})
+                    reason = monitor.check(self.get_counts(), self.get_steps()) if monitor else None
+                    if reason:
+                        print(f"Stopping after {self.get_steps()} steps: {reason}")
+                        break
+        finally:
+            for walker in self._walkers:
+                walker.close()
+        for walker in self._walkers:
+            result.merge(walker.get_result())
+        return result
+
+    def resume(self, checkpointer):
+        """Restores walkers from the checkpoint and returns the saved state, or None if there was nothing to resume"""
+        state = checkpointer.load()
+        if state is None:
+            return None
+        self.set_state(state['walkers'])
+        print(f"Resuming from checkpoint after {self.get_steps()} steps")
+        return state
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	FakeServer.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Local stand-in for the Crossref and PubMed endpoints, serving recorded fixtures with injected faults"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from random import Random
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+import json
+import re
+import socket
+import threading
+import time
+
+from DOI import canonical_doi
+
+DOI_PATTERN = re.compile(r'10\.\d{4,9}/[^"\s\[\]]+')
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+#Fault -> its entry in get_counts()
+FAULT_COUNTS = {'error': 'errors', 'throttled': 'throttled', 'reset': 'resets', 'stall': 'stalls'}
+
+class FakeServer:
+    """Serves /works/{doi} and /works?query.bibliographic= like Crossref and esearch/efetch like
+    NCBI E-utilities. Bibliographic search ranks works by the share of their title words in the query.
+
+    Every request waits latency seconds (plus up to jitter more). Faults are drawn from a seeded
+    RNG so that runs are comparable: a 503 with probability error_rate, a 429 with a Retry-After
+    of retry_after seconds with probability throttle_rate, a connection dropped without a response
+    with probability reset_rate, and a response held back for stall seconds (long enough to time
+    clients out) with probability stall_rate. outage(seconds) answers everything with 503s for a while.
+    """
+    def __init__(self, fixtures, latency = 0.0, jitter = 0.0, error_rate = 0.0, throttle_rate = 0.0,
+                 retry_after = 1, reset_rate = 0.0, stall_rate = 0.0, stall = 60.0, seed = 0,
+                 host = '127.0.0.1', port = 0):
+        self._crossref = fixtures['crossref']
+        self._pubmed = fixtures['pubmed']
+        self._pmids = {enrichment['pmid']: (doi, enrichment) for doi, enrichment in self._pubmed.items() if enrichment}
+        self._title_words = {doi: set(WORD_PATTERN.findall(' '.join(query['message'].get('title') or []).lower()))
+                             for doi, query in self._crossref.items()}
+        self._latency = latency
+        self._jitter = jitter
+        self._faults = dict()
+        self.set_faults(error_rate=error_rate, throttle_rate=throttle_rate, retry_after=retry_after,
+                        reset_rate=reset_rate, stall_rate=stall_rate, stall=stall)
+        self._outage_until = 0.0
+        self._rng = Random(seed)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._counts = {name: 0 for name in FAULT_COUNTS.values()}
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    def get_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def get_crossref_url(self):
+        return self.get_url()
+
+    def get_eutils_url(self):
+        return f"{self.get_url()}/entrez/eutils"
+
+    def get_counts(self):
+        with self._lock:
+            return {'requests': self._requests, **self._counts}
+
+    def set_faults(self, **faults):
+        """Changes any of the fault settings given to the constructor, e.g. halfway through a run"""
+        unknown = set(faults) - {'error_rate', 'throttle_rate', 'retry_after', 'reset_rate', 'stall_rate', 'stall'}
+        if unknown:
+            raise TypeError(f"Unknown faults: {', '.join(sorted(unknown))}")
+        self._faults.update(faults)
+
+    def outage(self, seconds):
+        """Fails every request with a 503 for the next seconds"""
+        self._outage_until = time.monotonic() + seconds
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _delay_and_fault(self):
+        """Waits out the latency and returns the fault to inject: None, 'error', 'throttled', 'reset' or 'stall'"""
+        faults = self._faults
+        with self._lock:
+            self._requests += 1
+            delay = self._latency + self._rng.random() * self._jitter
+            draw = self._rng.random()
+            fault = None
+            if time.monotonic() < self._outage_until:
+                fault = 'error'
+            else:
+                for name, rate in (('error', faults['error_rate']), ('throttled', faults['throttle_rate']),
+                                   ('reset', faults['reset_rate']), ('stall', faults['stall_rate'])):
+                    if draw < rate:
+                        fault = name
+                        break
+                    draw -= rate
+            if fault:
+                self._counts[FAULT_COUNTS[fault]] += 1
+        if delay:
+            time.sleep(delay)
+        return fault
+
+    def _works(self, doi):
+        query = self._crossref.get(canonical_doi(doi) or doi.lower())
+        if query is None:
+            return 404, 'text/plain', b'Resource not found.'
+        return 200, 'application/json', json.dumps(query).encode('utf-8')
+
+    def _search(self, params):
+        words = set(WORD_PATTERN.findall(params.get('query.bibliographic', [''])[0].lower()))
+        rows = int(params.get('rows', ['20'])[0])
+        scored = sorted(((len(words & title) / len(title), doi) for doi, title in self._title_words.items()
+                         if title and words & title), reverse=True)[:rows]
+        items = [dict(self._crossref[doi]['message'], score=score) for score, doi in scored]
+        body = {'status': 'ok', 'message-type': 'work-list', 'message': {'total-results': len(items), 'items': items}}
+        return 200, 'application/json', json.dumps(body).encode('utf-8')
+
+    def _esearch(self, params):
+        #Terms are a DOI, or "doi"[aid] clauses joined by OR
+        term = params.get('term', [''])[0]
+        pmids = []
+        for doi in DOI_PATTERN.findall(term):
+            enrichment = self._pubmed.get(canonical_doi(doi))
+            if enrichment:
+                pmids.append(enrichment['pmid'])
+        ids = ''.join(f"<Id>{escape(pmid)}</Id>" for pmid in pmids)
+        body = f"<eSearchResult><Count>{len(pmids)}</Count><IdList>{ids}</IdList></eSearchResult>"
+        return 200, 'text/xml', body.encode('utf-8')
+
+    def _efetch(self, params):
+        articles = []
+        for pmid in params.get('id', [''])[0].split(','):
+            if pmid in self._pmids:
+                articles.append(_pubmed_article(*self._pmids[pmid]))
+        body = f"<PubmedArticleSet>{''.join(articles)}</PubmedArticleSet>"
+        return 200, 'text/xml', body.encode('utf-8')
+
+    def _route(self, path, params):
+        if path.startswith('/works/'):
+            return self._works(unquote(path[len('/works/'):]))
+        if path.rstrip('/') == '/works':
+            return self._search(params)
+        if path.endswith('/esearch.fcgi'):
+            return self._esearch(params)
+        if path.endswith('/efetch.fcgi'):
+            return self._efetch(params)
+        return 404, 'text/plain', b'Not found'
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                fault = server._delay_and_fault()
+                headers = dict()
+                if fault == 'reset':
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    return
+                if fault == 'stall':
+                    time.sleep(server._faults['stall'])
+                if fault == 'error':
+                    status, content_type, body = 503, 'text/plain', b'Service unavailable'
+                elif fault == 'throttled':
+                    status, content_type, body = 429, 'text/plain', b'Too many requests'
+                    headers['Retry-After'] = f"{server._faults['retry_after']:g}"
+                else:
+                    status, content_type, body = server._route(url.path, parse_qs(url.query))
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header('Content-Type', content_type)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    #The client gave up on a stalled response
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def _pubmed_article(doi, enrichment):
+    authors = []
+    for author in enrichment.get('authors') or []:
+        last_name, _, initials = author.rpartition(' ')
+        if not last_name:
+            last_name, initials = initials, ''
+        authors.append(f"<Author><LastName>{escape(last_name)}</LastName>"
+                       f"<Initials>{escape(initials)}</Initials></Author>")
+    year = enrichment.get('year')
+    return (f"<PubmedArticle><MedlineCitation><PMID>{escape(enrichment['pmid'])}</PMID><Article>"
+            f"<Journal><JournalIssue><PubDate><Year>{year or ''}</Year></PubDate></JournalIssue></Journal>"
+            f"<ArticleTitle>{escape(enrichment.get('title') or '')}</ArticleTitle>"
+            f"<AuthorList>{''.join(authors)}</AuthorList>"
+            f"</Article></MedlineCitation>"
+            f"<PubmedData><ArticleIdList><ArticleId IdType=\"doi\">{escape(doi)}</ArticleId></ArticleIdList></PubmedData>"
+            f"</PubmedArticle>")
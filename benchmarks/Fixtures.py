@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	Fixtures.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Recorded (or synthesized) Crossref and PubMed responses for the benchmarks
+
+Fixtures are a dict of 'corpus' (starting DOIs), 'crossref' (DOI -> works response) and
+'pubmed' (DOI -> enrichment dict as cached by main.pubmed_enrichment, {} when not in PubMed),
+stored as gzipped JSON.
+"""
+
+from random import Random
+import csv
+import gzip
+import hashlib
+import json
+import os
+
+from DOI import canonical_doi
+
+#On-topic titles for synthesized works; a fixed file, since output.csv is rewritten by every run and would
+#change fixtures_key and stop bench.py comparing against earlier results
+TITLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'titles.csv')
+
+def load_fixtures(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        return json.load(file)
+
+def save_fixtures(fixtures, path):
+    with gzip.open(path, 'wt', encoding='utf-8') as file:
+        json.dump(fixtures, file, sort_keys=True)
+
+def fixtures_key(fixtures):
+    """Content hash, so results are only compared between runs on the same fixtures"""
+    content = json.dumps(fixtures, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(content).hexdigest()[:16]
+
+def read_corpus(path):
+    with open(path, 'r', encoding='utf-8-sig') as csvfile:
+        dois = (canonical_doi(row['DOI']) for row in csv.DictReader(csvfile))
+        return list(dict.fromkeys(doi for doi in dois if doi))
+
+def _read_column(path, column):
+    with open(path, 'r', encoding='utf-8-sig') as csvfile:
+        return [row[column] for row in csv.DictReader(csvfile) if row.get(column)]
+
+def works_response(doi, title, authors, year, references, issued = True):
+    message = {'DOI': doi,
+               'title': [title],
+               'author': [{'given': given, 'family': family} for given, family in authors],
+               'created': {'date-time': f"{year}-01-01T00:00:00Z"},
+               'references-count': len(references),
+               'reference': references}
+    if issued:
+        message['issued'] = {'date-parts': [[year]]}
+    return {'status': 'ok', 'message-type': 'work', 'message': message}
+
+#Off-topic works are built from these, so that nothing about them matches the repo's keywords or authors
+OFF_TOPIC_SUBJECTS = ('Thermal conductivity', 'Grain boundary migration', 'Seismic attenuation', 'Lexical access',
+                      'Sediment transport', 'Photonic bandgap', 'Labour market mobility', 'Coral bleaching')
+OFF_TOPIC_OBJECTS = ('layered ceramics', 'alpine catchments', 'bilingual speakers', 'urban housing',
+                     'thin film alloys', 'coastal wetlands', 'granular media', 'reef systems')
+OFF_TOPIC_SURNAMES = ('Okonkwo', 'Lindqvist', 'Haddad', 'Takahashi', 'Moreau', 'Kowalczyk', 'Ferreira', 'Ivanova')
+
+def synthesize(corpus, titles, surnames, n_papers = 500, refs_per_paper = 25, missing_rate = 0.05,
+               no_doi_rate = 0.05, pubmed_rate = 0.7, no_issued_rate = 0.2, off_topic_rate = 0.0, seed = 0):
+    """Deterministic citation graph of n_papers works reachable from the corpus DOIs.
+
+    Titles and author surnames are drawn from the repo's own CSVs so that scoring sees
+    realistic text. A fraction of references point at DOIs that are not served (missing_rate)
+    or carry no DOI at all (no_doi_rate), and some works lack an issued date (no_issued_rate)
+    so that they need PubMed enrichment, as in real Crossref data. A fraction of the works outside
+    the corpus (off_topic_rate) have titles and authors that score nothing.
+    """
+    rng = Random(seed)
+    dois = list(corpus) + [f"10.5555/bench.{i:06d}" for i in range(n_papers - len(corpus))]
+    papers = []
+    for i, doi in enumerate(dois):
+        off_topic = i >= len(corpus) and rng.random() < off_topic_rate
+        if off_topic:
+            title = f"{rng.choice(OFF_TOPIC_SUBJECTS)} in {rng.choice(OFF_TOPIC_OBJECTS)} ({i})"
+        else:
+            title = titles[i] if i < len(titles) else f"{rng.choice(titles)} ({i})"
+        authors = [(rng.choice('ABCDEFGHJKLMNPRSTW') + '.', rng.choice(OFF_TOPIC_SURNAMES if off_topic else surnames))
+                   for _ in range(rng.randint(1, 6))]
+        papers.append((doi, title, authors, rng.randint(1980, 2023)))
+
+    crossref = dict()
+    pubmed = dict()
+    for i, (doi, title, authors, year) in enumerate(papers):
+        references = []
+        for k in range(rng.randint(refs_per_paper // 2, refs_per_paper * 3 // 2)):
+            roll = rng.random()
+            if roll < no_doi_rate:
+                #Cited without a DOI, alternately with the usual fields and as free text only
+                _, ref_title, ref_authors, ref_year = rng.choice(papers)
+                if k % 2:
+                    references.append({'key': f"ref{k}", 'article-title': ref_title,
+                                       'author': ref_authors[0][1], 'year': str(ref_year)})
+                else:
+                    references.append({'key': f"ref{k}", 'unstructured': f"{ref_authors[0][1]} {ref_authors[0][0]} "
+                                                                          f"{ref_title}. {ref_year}."})
+                continue
+            if roll < no_doi_rate + missing_rate:
+                references.append({'key': f"ref{k}", 'DOI': f"10.5555/missing.{rng.randrange(10 ** 6):06d}"})
+                continue
+            ref_doi, ref_title, ref_authors, ref_year = rng.choice(papers)
+            references.append({'key': f"ref{k}", 'DOI': ref_doi, 'article-title': ref_title,
+                               'author': ref_authors[0][1], 'year': str(ref_year)})
+        crossref[doi] = works_response(doi, title, authors, year, references,
+                                       issued=rng.random() >= no_issued_rate)
+        if rng.random() < pubmed_rate:
+            pubmed[doi] = {'pmid': str(30000000 + i),
+                           'title': title,
+                           'authors': [f"{family} {given.rstrip('.')}" for given, family in authors],
+                           'year': year}
+        else:
+            pubmed[doi] = {}
+    return {'corpus': list(corpus), 'crossref': crossref, 'pubmed': pubmed}
+
+def synthesize_from_repo(corpus_path = 'corpus.csv', titles_path = TITLES_PATH,
+                         authors_path = 'important_authors.csv', **kwargs):
+    return synthesize(read_corpus(corpus_path),
+                      _read_column(titles_path, 'title'),
+                      _read_column(authors_path, 'Last'),
+                      **kwargs)
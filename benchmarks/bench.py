@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	bench.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Benchmarks against recorded fixtures served locally, flagging regressions against the last run
+
+Usage: python benchmarks/bench.py [--fixtures PATH] [--latency S] [--error-rate P] [--throttle-rate P] [--steps N]
+
+Without recorded fixtures (see record.py) a deterministic citation graph is synthesized from
+the repo's CSVs. Results are saved to benchmarks/results/ and compared with the previous run on
+the same fixtures and settings.
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from functools import partial
+
+ROOT = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, ROOT)
+#main.py reads its CSVs relative to the working directory
+os.chdir(ROOT)
+
+import main
+from Cache import MetadataCache
+from Decisions import DecisionCache
+from DOI import DOIAliasIndex
+from Http import reset_clients
+from Matcher import PaperMatcher
+from Metrics import metrics
+from PubMed import EutilsClient
+from Registry import PaperRegistry
+from Render import render
+from Resolver import CorpusResolver
+from Titles import TitleIndex
+from Triage import ReferenceTriage
+from Walkers import WalkResult, WalkerPool
+from FakeServer import FakeServer
+from Fixtures import load_fixtures, fixtures_key, synthesize_from_repo
+
+DEFAULT_FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures', 'fixtures.json.gz')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+#Metric -> True if higher is better
+METRICS = {'resolve_seconds': False,
+           'surf_cold_steps_per_second': True,
+           'surf_warm_steps_per_second': True,
+           'scoring_papers_per_second': True,
+           'bytes_per_paper': False,
+           'fetches_per_accepted': False,
+           'no_doi_attempts': False,
+           'render_seconds': False}
+
+def use_endpoints(server, cache_path, pubmed_rate, crossref_rate = None):
+    """Points main's module-level clients at the fake server and a scratch cache"""
+    main.CROSSREF_URL = server.get_crossref_url()
+    if crossref_rate is not None:
+        main.CROSSREF_RATE = crossref_rate
+    main.PUBMED_RATE = pubmed_rate
+    reset_clients()
+    main.fetch = EutilsClient(server.get_eutils_url(), rate=pubmed_rate, **main.http_policy())
+    main.pubmed_batcher = None
+    main.cache = MetadataCache(cache_path, ttl=main.CACHE_TTL, max_entries=main.CACHE_MAX_ENTRIES)
+    main.aliases = DOIAliasIndex(main.cache)
+    main.titles = TitleIndex(main.cache, lookup=main.query_bibliographic, max_lookups=main.TITLE_LOOKUPS,
+                             max_titles=main.TITLE_INDEX_SIZE)
+
+def bench_resolve(corpus):
+    resolver = CorpusResolver(main.query_from_DOI, main.make_paper_from_query, max_in_flight=main.MAX_IN_FLIGHT,
+                              log=main.log)
+    start = time.perf_counter()
+    papers = resolver.resolve(corpus)
+    elapsed = time.perf_counter() - start
+    starting_papers = PaperRegistry()
+    for paper in papers:
+        starting_papers.add(paper)
+    return elapsed, starting_papers
+
+def bench_surf(starting_papers, matcher, n_walkers, steps, seed, triage = None, titles = None):
+    """Steps per second over all walkers, with a fresh decision cache (the metadata cache is kept)"""
+    decisions = DecisionCache(failure_ttl=main.FAILED_FETCH_TTL)
+    walk_surf = partial(main.surf, matcher=matcher, decisions=decisions, cr=None, back_to_start_weight=0.15,
+                        triage=triage, titles=titles)
+    result = WalkResult()
+    pool = WalkerPool(walk_surf, starting_papers, matcher, n_walkers=n_walkers, seed=seed)
+    start = time.perf_counter()
+    pool.run(steps, result=result)
+    elapsed = time.perf_counter() - start
+    return n_walkers * steps / elapsed, result, decisions
+
+def bench_scoring(papers, matcher, min_seconds = 1.0):
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for paper in papers:
+            matcher.scores(paper)
+        count += len(papers)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return count / elapsed
+
+def bench_memory(fixtures):
+    """Retained bytes per Paper built from the fixtures (enrichment is already cached by then)"""
+    queries = list(fixtures['crossref'].values())
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    papers = [main.make_paper_from_query(query) for query in queries]
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return retained / len(papers), papers
+
+def bench_render(graph, directory):
+    start = time.perf_counter()
+    render(graph, os.path.join(directory, 'bench_graph.svg'), cache_dir=None)
+    return time.perf_counter() - start
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def previous_result(results_dir, config):
+    if not os.path.isdir(results_dir):
+        return None
+    for name in sorted(os.listdir(results_dir), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(results_dir, name), 'r', encoding='utf-8') as file:
+            result = json.load(file)
+        if result.get('config') == config:
+            return result
+    return None
+
+def regressions(results, previous, threshold):
+    flagged = []
+    for metric, higher_is_better in METRICS.items():
+        old, new = previous['metrics'].get(metric), results.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > threshold:
+            flagged.append((metric, old, new, change))
+    return flagged
+
+def main_bench():
+    parser = argparse.ArgumentParser(description='Benchmark corpus resolution, surfing, scoring, memory and rendering')
+    parser.add_argument('--fixtures', default=None, help=f"recorded fixtures (default {DEFAULT_FIXTURES} if present, else synthesized)")
+    parser.add_argument('--papers', type=int, default=500, help='size of the synthesized citation graph')
+    parser.add_argument('--off-topic-rate', type=float, default=0.0, help='fraction of synthesized works that score nothing')
+    parser.add_argument('--no-doi-rate', type=float, default=0.05, help='fraction of synthesized references without a DOI')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every fake server response')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of fake server responses that are 503s')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction that are 429s')
+    parser.add_argument('--reset-rate', type=float, default=0.0, help='fraction of connections dropped without a response')
+    parser.add_argument('--walkers', type=int, default=1)
+    parser.add_argument('--steps', type=int, default=200, help='steps per walker')
+    parser.add_argument('--seed', default='bench')
+    parser.add_argument('--crossref-rate', type=float, default=main.CROSSREF_RATE)
+    parser.add_argument('--pubmed-rate', type=float, default=main.PUBMED_RATE)
+    parser.add_argument('--no-render', action='store_true')
+    parser.add_argument('--no-triage', action='store_true', help='pick references uniformly')
+    parser.add_argument('--no-titles', action='store_true', help='skip references without a DOI instead of matching titles')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative change flagged as a regression')
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    parser.add_argument('--no-save', action='store_true')
+    parser.add_argument('--verbose', action='store_true', help='keep the crawl output')
+    args = parser.parse_args()
+
+    fixtures_path = args.fixtures or (DEFAULT_FIXTURES if os.path.exists(DEFAULT_FIXTURES) else None)
+    if fixtures_path:
+        fixtures = load_fixtures(fixtures_path)
+    else:
+        fixtures = synthesize_from_repo(n_papers=args.papers, off_topic_rate=args.off_topic_rate,
+                                        no_doi_rate=args.no_doi_rate)
+    config = {'fixtures': fixtures_key(fixtures), 'latency': args.latency, 'jitter': args.jitter,
+              'error_rate': args.error_rate, 'throttle_rate': args.throttle_rate, 'reset_rate': args.reset_rate,
+              'walkers': args.walkers, 'steps': args.steps, 'seed': args.seed,
+              'crossref_rate': args.crossref_rate, 'pubmed_rate': args.pubmed_rate, 'render': not args.no_render,
+              'triage': not args.no_triage, 'titles': not args.no_titles}
+    print(f"Fixtures: {fixtures_path or 'synthesized'} ({len(fixtures['crossref'])} works)")
+
+    results = dict()
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+    with tempfile.TemporaryDirectory() as directory, \
+         FakeServer(fixtures, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                    throttle_rate=args.throttle_rate, retry_after=0, reset_rate=args.reset_rate) as server, \
+         quiet:
+        use_endpoints(server, os.path.join(directory, 'cache.sqlite'), args.pubmed_rate, args.crossref_rate)
+        results['resolve_seconds'], starting_papers = bench_resolve(fixtures['corpus'])
+
+        important_authors = main.read_important_authors()
+        for paper in starting_papers:
+            for author in (paper.get_first_author(), paper.get_last_author()):
+                if author and author.lower() not in important_authors:
+                    important_authors.append(author.lower())
+        abx_list, abx_colours = main.read_abx_colours()
+        matcher = PaperMatcher(main.read_keywords(), important_authors, abx_list, abx_colours,
+                               score_authors=main.SCORE_AUTHORS)
+
+        titles = None if args.no_titles else main.titles
+        triage = None
+        if not args.no_triage:
+            triage = ReferenceTriage(matcher, low_score=main.LOW_SCORE, promising_weight=main.TRIAGE_PROMISING_WEIGHT,
+                                     irrelevant_weight=main.TRIAGE_IRRELEVANT_WEIGHT, titles=titles)
+        results['surf_cold_steps_per_second'], result, decisions = bench_surf(starting_papers, matcher, args.walkers,
+                                                                             args.steps, args.seed, triage, titles)
+        #Attempts in the cold walk that ended on a reference without a usable DOI
+        results['no_doi_attempts'] = metrics.get_count('references.no_doi') / max(1, metrics.get_count('surf.attempts'))
+        results['surf_warm_steps_per_second'], _, _ = bench_surf(starting_papers, matcher, args.walkers,
+                                                                 args.steps, args.seed, triage, titles)
+        results['bytes_per_paper'], papers = bench_memory(fixtures)
+        results['scoring_papers_per_second'] = bench_scoring(papers, matcher)
+        if not args.no_render:
+            results['render_seconds'] = bench_render(result.graph.to_networkx(), directory)
+        results['papers_fetched'] = sum(1 for _, decision in decisions.items() if not decision.is_failed())
+        #Fetches (including those scored too low to keep) per paper accepted in the cold walk
+        results['fetches_per_accepted'] = results['papers_fetched'] / max(1, decisions.count('accepted'))
+        results['server'] = server.get_counts()
+        main.cache.close()
+
+    for metric, value in results.items():
+        print(f"{metric:>30}: {value:.2f}" if isinstance(value, float) else f"{metric:>30}: {value}")
+
+    previous = previous_result(args.results_dir, config)
+    flagged = regressions(results, previous, args.threshold) if previous else []
+    if previous:
+        print(f"Compared with {previous['time']} ({previous.get('commit')})")
+    for metric, old, new, change in flagged:
+        print(f"REGRESSION {metric}: {old:.2f} -> {new:.2f} ({change:+.0%})")
+
+    if not args.no_save:
+        now = datetime.now(timezone.utc)
+        os.makedirs(args.results_dir, exist_ok=True)
+        path = os.path.join(args.results_dir, f"{now.strftime('%Y%m%dT%H%M%S')}.json")
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'time': now.isoformat(), 'commit': git_commit(), 'python': platform.python_version(),
+                       'config': config, 'metrics': results, 'instrumentation': metrics.snapshot()},
+                      file, indent=2)
+        print(f"Results saved to {path}")
+    return 1 if flagged else 0
+
+if __name__ == '__main__':
+    sys.exit(main_bench())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	faults.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Drives the shared Http client against the fake server under injected faults
+
+Usage: python benchmarks/faults.py [--requests N] [--threads N] [--seed S]
+
+Each scenario fetches the same works through a fresh client and reports how many came back,
+how many requests the server saw, and what the client did about the faults (retries, breaker
+openings). It exits non-zero if a scenario loses a work it should have recovered, or if the
+breaker lets the outage scenario keep hammering the server.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import time
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, ROOT)
+
+from Http import HostPolicy, HttpClient, PermanentError, TransientError
+from Metrics import metrics
+from FakeServer import FakeServer
+from Fixtures import synthesize_from_repo
+
+#name -> (FakeServer faults, HostPolicy settings, client timeout, outage seconds)
+SCENARIOS = {
+    'clean': ({}, {}, 5, 0),
+    'errors': ({'error_rate': 0.2}, {}, 5, 0),
+    'throttled': ({'throttle_rate': 0.3, 'retry_after': 0.05}, {}, 5, 0),
+    'resets': ({'reset_rate': 0.1}, {}, 5, 0),
+    'stalls': ({'stall_rate': 0.05, 'stall': 1.0}, {}, 0.2, 0),
+    'outage': ({}, {'reset_timeout': 0.5}, 5, 2.0),
+}
+
+def run_scenario(server, dois, faults, policy, timeout, outage, threads, seed):
+    server.set_faults(**{'error_rate': 0.0, 'throttle_rate': 0.0, 'retry_after': 1, 'reset_rate': 0.0,
+                         'stall_rate': 0.0, 'stall': 60.0, **faults})
+    metrics.reset()
+    settings = {'retries': 6, 'backoff': 0.05, 'max_backoff': 1, 'failure_threshold': 5, 'reset_timeout': 1,
+                'max_pause': 30, 'seed': seed, **policy}
+    client = HttpClient(HostPolicy('fault', **settings), timeout=timeout)
+    before = server.get_counts()['requests']
+
+    def fetch(doi):
+        try:
+            return client.get(f"{server.get_crossref_url()}/works/{quote(doi, safe='/')}").json()
+        except (PermanentError, TransientError):
+            return None
+
+    start = time.perf_counter()
+    if outage:
+        server.outage(outage)
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(fetch, dois))
+    elapsed = time.perf_counter() - start
+    return {'ok': sum(1 for result in results if result),
+            'requests': server.get_counts()['requests'] - before,
+            'retries': metrics.get_count('http.fault.retries'),
+            'opened': metrics.get_count('http.fault.circuit_opened'),
+            'seconds': elapsed}
+
+def main():
+    parser = argparse.ArgumentParser(description='Check retries, backoff and the circuit breaker against injected faults')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    fixtures = synthesize_from_repo(n_papers=args.requests)
+    dois = list(fixtures['crossref'])[:args.requests]
+    failed = []
+    print(f"{'scenario':<12}{'ok':>8}{'requests':>10}{'retries':>9}{'opened':>8}{'seconds':>9}")
+    with FakeServer(fixtures, seed=args.seed) as server:
+        for name, (faults, policy, timeout, outage) in SCENARIOS.items():
+            result = run_scenario(server, dois, faults, policy, timeout, outage, args.threads, args.seed)
+            print(f"{name:<12}{result['ok']:>8}{result['requests']:>10}{result['retries']:>9}"
+                  f"{result['opened']:>8}{result['seconds']:>9.2f}")
+            if result['ok'] < len(dois):
+                failed.append(f"{name}: {len(dois) - result['ok']} works lost")
+            #Without the breaker, every thread would retry through the outage
+            if outage and result['requests'] > 2 * len(dois):
+                failed.append(f"{name}: {result['requests']} requests for {len(dois)} works")
+    for failure in failed:
+        print(f"FAILED {failure}")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
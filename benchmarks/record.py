@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filename: 	record.py
+# Author: 	Alessandro Gerada, Nada Reza
+# Date: 	2026-10-18
+# Copyright: 	Alessandro Gerada 2023
+# Email: 	alessandro.gerada@liverpool.ac.uk
+
+"""Records live Crossref and PubMed responses for the corpus and its references
+
+Usage: python benchmarks/record.py [--max-papers N] [--out benchmarks/fixtures/fixtures.json.gz]
+"""
+
+import argparse
+import os
+import sys
+import time
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+
+from DOI import canonical_doi
+from PubMed import EutilsClient
+from Fixtures import read_corpus, save_fixtures
+
+def record(corpus, max_papers = 300, mailto = None, crossref_delay = 0.1, pubmed_delay = 0.34):
+    """Breadth first from the corpus until max_papers works have been recorded"""
+    session = requests.Session()
+    pubmed_client = EutilsClient(email=mailto)
+    params = {'mailto': mailto} if mailto else {}
+    crossref = dict()
+    pubmed = dict()
+    queue = list(corpus)
+    queued = set(queue)
+    while queue and len(crossref) < max_papers:
+        doi = queue.pop(0)
+        response = session.get(f"https://api.crossref.org/works/{quote(doi, safe='/')}", params=params, timeout=30)
+        time.sleep(crossref_delay)
+        if response.status_code != 200:
+            print(f"Crossref {response.status_code} for {doi}")
+            continue
+        query = response.json()
+        doi = canonical_doi(query['message']['DOI'])
+        crossref[doi] = query
+        print(f"Recorded {len(crossref)}: {doi}")
+
+        enrichment = {}
+        pmids = pubmed_client.pmids_for_query(doi)
+        time.sleep(pubmed_delay)
+        if pmids:
+            article = pubmed_client.article_by_pmid(pmids[0])
+            time.sleep(pubmed_delay)
+            if article:
+                enrichment = {'pmid': pmids[0], 'title': article.title, 'authors': article.authors,
+                              'year': article.year}
+        pubmed[doi] = enrichment
+
+        for reference in query['message'].get('reference', []):
+            reference_doi = canonical_doi(reference.get('DOI') or '')
+            if reference_doi and reference_doi not in queued:
+                queued.add(reference_doi)
+                queue.append(reference_doi)
+    return {'corpus': list(corpus), 'crossref': crossref, 'pubmed': pubmed}
+
+def main():
+    parser = argparse.ArgumentParser(description='Record Crossref and PubMed fixtures for the benchmarks')
+    parser.add_argument('--corpus', default=os.path.join(ROOT, 'corpus.csv'))
+    parser.add_argument('--max-papers', type=int, default=300)
+    parser.add_argument('--mailto', default=None, help='contact address for the Crossref polite pool')
+    parser.add_argument('--out', default=os.path.join(ROOT, 'benchmarks', 'fixtures', 'fixtures.json.gz'))
+    args = parser.parse_args()
+    fixtures = record(read_corpus(args.corpus), max_papers=args.max_papers, mailto=args.mailto)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    save_fixtures(fixtures, args.out)
+    print(f"Saved {len(fixtures['crossref'])} works to {args.out}")
+
+if __name__ == '__main__':
+    main()
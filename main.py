@@ -8,260 +8,668 @@
 
 """Documentation"""
 
-from habanero import Crossref
-from Bio import Entrez
-from metapub import PubMedFetcher
-import urllib.request
-from urllib.error import HTTPError
+import argparse
+import atexit
 import csv
+import hashlib
+import os
+import sys
 from datetime import datetime
-from random import random, choice
-from anytree import Node, RenderTree
+from random import Random
+from functools import partial
+from urllib.parse import quote
 from unidecode import unidecode
 from Surf import SurfWrapper, BackToStart, InvalidReferences, NewPaper, PreviouslySeenPaper, LowScorePaper
-from Paper import Paper, DAGNode
-import numpy as np
-import matplotlib.pyplot as plt
-import networkx as nx 
-from matplotlib.patches import FancyArrowPatch
-import metapub
-from networkx.drawing.nx_agraph import graphviz_layout as graphviz_layout
-
-Entrez.email = 'youremail@email.com'
+from Paper import Paper
+from Cache import MetadataCache
+from Walkers import WalkResult, WalkerPool
+from Prefetch import Prefetcher
+from Registry import PaperRegistry, choice_from
+from DOI import canonical_doi, DOIAliasIndex
+from Crossref import publication_year
+from Titles import TitleIndex
+from Matcher import PaperMatcher
+from Decisions import DecisionCache
+from Checkpoint import Checkpointer
+from EventLog import SurfEventLog, write_output
+from Metrics import metrics
+from Convergence import ConvergenceMonitor
+
+#Network, numeric and plotting libraries are imported by the stage that needs them, so importing
+#this module (e.g. from a worker or the benchmarks) is cheap and has no side effects
+
+EMAIL = 'youremail@email.com'
 NCBI_API_KEY='your_API_key'
-fetch = PubMedFetcher()
 #into terminal: export NCBI_API_KEY='YOUR API-KEY'
+#PubMed client and the batcher in front of it, created on first use; the client needs enrich_many(dois)
+fetch = None
+pubmed_batcher = None
 
+STARTING_CORPUS_PATH = 'corpus.csv'
 KEYWORDS = 'keywords.csv'
 IMPORTANT_AUTHORS = 'important_authors.csv'
-
-keywords = [] 
-important_authors = [] 
-
-with open(KEYWORDS, 'r') as csvfile:
-    reader = csv.DictReader(csvfile)
-    for row in reader:
-        keyterm = row['keyterms']
-        value = row['value']
-        keyword = [unidecode(keyterm).lower(), value]
-        keywords.append(keyword)
-    
-with open(IMPORTANT_AUTHORS, 'r') as csvfile:
-    reader = csv.DictReader(csvfile)
-    for row in reader:
-        author = row['Last']
-        author = unidecode(author)
-        author = author.lower()
-        important_authors.append(author)
+ABX_COLOURS = 'antibiotic_colours.csv'
+
+#Crossref and PubMed responses are kept between runs; set CACHE_ONLY to surf without network access
+CACHE_PATH = 'metadata_cache.sqlite'
+CACHE_TTL = 60 * 60 * 24 * 30
+CACHE_MAX_ENTRIES = 100000
+CACHE_ONLY = False
+#Opened on first use, or by open_cache()
+cache = None
+aliases = None
+titles = None
+
+#Set SNAPSHOT_PATH to a directory built by Snapshot.py to surf offline, without Crossref or PubMed
+SNAPSHOT_PATH = None
+
+#Crossref endpoint, overridden by the benchmarks to point at a local fake server
+CROSSREF_URL = 'https://api.crossref.org'
+
+#Starting corpus is resolved concurrently; rates are requests per second per service
+MAX_IN_FLIGHT = 8
+CROSSREF_RATE = 10
+PUBMED_RATE = 3
+
+#Failed requests are retried HTTP_RETRIES times, backing off from HTTP_BACKOFF seconds; after CIRCUIT_FAILURES
+#failures in a row a service is left alone for CIRCUIT_RESET seconds, callers pausing up to CIRCUIT_MAX_PAUSE
+HTTP_RETRIES = 4
+HTTP_BACKOFF = 0.5
+HTTP_TIMEOUT = 30
+CIRCUIT_FAILURES = 5
+CIRCUIT_RESET = 10
+CIRCUIT_MAX_PAUSE = 60
+
+#PubMed is only asked for papers missing a Crossref title, author or year, PUBMED_BATCH DOIs per request
+PUBMED_BATCH = 50
+PUBMED_BATCH_DELAY = 0.1
+
+#Independent walkers run in parallel and their visit counts are merged; SEED makes runs reproducible
+N_WALKERS = 4
+STEPS_PER_WALKER = 10
+SEED = None
+default_rng = Random()
+
+#'converge' walks until the ranking stops changing, within MAX_STEPS_PER_WALKER and MAX_SECONDS (None for no limit);
+#'steps' walks exactly STEPS_PER_WALKER. Converged means the top CONVERGE_TOP_K papers overlap by CONVERGE_OVERLAP
+#and at most CONVERGE_DISCOVERY new papers turn up per step, for CONVERGE_PATIENCE checks of CONVERGE_EVERY steps per walker
+STOP = 'converge'
+MAX_STEPS_PER_WALKER = 2000
+MAX_SECONDS = None
+CONVERGE_EVERY = 25
+CONVERGE_TOP_K = 20
+CONVERGE_OVERLAP = 0.9
+CONVERGE_DISCOVERY = 0.1
+CONVERGE_PATIENCE = 3
+
+#Walk state is saved every CHECKPOINT_EVERY steps per walker (and on Ctrl-C); RESUME continues from the last checkpoint
+CHECKPOINT_PATH = 'surf_checkpoint.pkl.gz'
+CHECKPOINT_EVERY = 50
+RESUME = True
+
+#Every surf step is appended to EVENT_LOG_PATH and OUTPUT_PATH is rewritten every RANKING_FLUSH_EVERY steps
+EVENT_LOG_PATH = 'surf_events.jsonl'
+OUTPUT_PATH = 'output.csv'
+RANKING_FLUSH_EVERY = 100
+
+#The DAG is saved to GRAPH_PATH and drawn headlessly to RENDER_PATH (None to skip); run Render.py to redraw later
+GRAPH_PATH = 'surf_graph.json'
+RENDER_PATH = 'surf_graph.svg'
+MAX_RENDER_NODES = 2000
+PRUNE_RENDER = True
+LAYOUT_CACHE_DIR = '.layout_cache'
+
+#Papers scoring at or below LOW_SCORE are rejected; failed fetches are not retried for FAILED_FETCH_TTL seconds
+#(doubling with each failure), DOIs Crossref has no work for not at all
+LOW_SCORE = 10
+FAILED_FETCH_TTL = 300
+
+#Authors have never counted towards a paper's score; SCORE_AUTHORS = True adds 25 * 0.375 for each important
+#author found in its first or last author's name, which changes the rankings
+SCORE_AUTHORS = False
+
+#Timings and counters are printed at exit; METRICS_PATH (None to skip) is rewritten every METRICS_EVERY seconds
+METRICS_PATH = 'surf_metrics.json'
+METRICS_EVERY = 10
+
+#'walk' ranks by visit counts; 'pagerank' uses the walk to discover the graph, then solves for the exact ranking
+RANKING = 'walk'
+
+#'surf' runs the threaded walkers; 'vectorized' (needs a snapshot) advances SIM_WALKERS walkers at once in NumPy
+#for the same number of steps each, and keeps the SIM_KEEP most visited papers for the DAG
+ENGINE = 'surf'
+SIM_WALKERS = 10000
+SIM_KEEP = MAX_RENDER_NODES
+
+#References are picked TRIAGE_PROMISING_WEIGHT times as often when their inline Crossref metadata already
+#scores above LOW_SCORE, and TRIAGE_IRRELEVANT_WEIGHT times as often (0 to skip) when it matches nothing
+TRIAGE = True
+TRIAGE_PROMISING_WEIGHT = 4.0
+TRIAGE_IRRELEVANT_WEIGHT = 0.1
+
+#References without a DOI are matched by title to papers seen now or in earlier runs; failing that, up to
+#TITLE_LOOKUPS per run (0 for none) are looked up on Crossref, comparing its best TITLE_LOOKUP_ROWS matches
+TITLE_LOOKUPS = 200
+TITLE_LOOKUP_ROWS = 3
+#Titles held in memory; the rest stay in the cache until looked up again
+TITLE_INDEX_SIZE = 50000
+
+#Each walker resolves references ahead of itself in the background; set PREFETCH_WORKERS = 0 to disable.
+#Prefetches only use rate capacity the walkers leave spare, waiting up to PREFETCH_WAIT seconds for it
+PREFETCH_WORKERS = 4
+PREFETCH_QUEUE = 32
+PREFETCH_WAIT = 10
+
+#Service.py runs up to SERVICE_MAX_JOBS jobs at once on SERVICE_HOST:SERVICE_PORT, keeping up to SERVICE_MAX_PAPERS
+#papers and the scores of SERVICE_MAX_MATCHERS keyword/author sets in memory between jobs
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8765
+SERVICE_MAX_JOBS = 4
+SERVICE_MAX_PAPERS = 100000
+SERVICE_MAX_MATCHERS = 8
+#Reference DOIs are interned in a table that is started afresh between jobs once it holds SERVICE_MAX_DOIS
+SERVICE_MAX_DOIS = 2000000
+
+#Walkers print every step and paper they look at; VERBOSE = False (Service.py --quiet) keeps only the summaries
+VERBOSE = True
+
+def log(*args):
+    if VERBOSE:
+        print(*args)
+
+def read_keywords(path = KEYWORDS):
+    keywords = []
+    with open(path, 'r') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            keyterm = row['keyterms']
+            value = row['value']
+            keyword = [unidecode(keyterm).lower(), value]
+            keywords.append(keyword)
+    return keywords
+
+def read_important_authors(path = IMPORTANT_AUTHORS):
+    important_authors = []
+    with open(path, 'r') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            author = row['Last']
+            author = unidecode(author)
+            author = author.lower()
+            important_authors.append(author)
+    return important_authors
+
+def read_abx_colours(path = ABX_COLOURS):
+    """Antibiotic names in file order, and their colours"""
+    abx_list = []
+    abx_colours = dict()
+    with open(path, 'r') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            abx = row['abx']
+            abx_colours[abx] = row['colour']
+            abx_list.append(abx)
+    return abx_list, abx_colours
+
+def inputs_digest(*paths):
+    """Hash of the contents of the input files, so a checkpoint is not resumed after any of them changed"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def open_cache(path = CACHE_PATH, cache_only = CACHE_ONLY):
+    global cache, aliases, titles
+    cache = MetadataCache(path, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, cache_only=cache_only)
+    aliases = DOIAliasIndex(cache)
+    titles = TitleIndex(cache, lookup=query_bibliographic, max_lookups=TITLE_LOOKUPS, max_titles=TITLE_INDEX_SIZE)
+    return cache
+
+def get_cache():
+    if cache is None:
+        open_cache()
+    return cache
+
+def get_aliases():
+    if aliases is None:
+        open_cache()
+    return aliases
+
+def get_titles():
+    if titles is None:
+        open_cache()
+    return titles
+
+def http_policy():
+    """Retry and circuit breaker settings for Http.get_client"""
+    return {'retries': HTTP_RETRIES, 'backoff': HTTP_BACKOFF, 'timeout': HTTP_TIMEOUT,
+            'failure_threshold': CIRCUIT_FAILURES, 'reset_timeout': CIRCUIT_RESET, 'max_pause': CIRCUIT_MAX_PAUSE,
+            'speculative_wait': PREFETCH_WAIT}
+
+def get_crossref_client():
+    from Http import get_client, USER_AGENT
+    return get_client(CROSSREF_URL, name='crossref', rate=CROSSREF_RATE,
+                      headers={'User-Agent': f"{USER_AGENT}; mailto:{EMAIL}"}, **http_policy())
+
+def get_fetcher():
+    global fetch
+    if fetch is None:
+        from PubMed import EutilsClient
+        fetch = EutilsClient(api_key=os.environ.get('NCBI_API_KEY'), email=EMAIL, rate=PUBMED_RATE, **http_policy())
+    return fetch
+
+def get_pubmed_batcher():
+    global pubmed_batcher
+    if pubmed_batcher is None:
+        from PubMed import PubMedBatcher
+        pubmed_batcher = PubMedBatcher(get_fetcher(), max_batch=PUBMED_BATCH, max_delay=PUBMED_BATCH_DELAY,
+                                       rate=PUBMED_RATE)
+    return pubmed_batcher
+
+def pubmed_enrichment(doi):
+    cache = get_cache()
+    enrichment = cache.get_pubmed(doi)
+    if enrichment is not None:
+        return enrichment
+    if cache.is_cache_only():
+        return {}
+    #Concurrent lookups (prefetchers, walkers, the corpus resolver) share multi-ID requests
+    from Http import TransientError
+    try:
+        enrichment = get_pubmed_batcher().enrich(canonical_doi(doi) or doi)
+    except TransientError as error:
+        #Enrichment only fills gaps, so the paper goes ahead without it (and it is asked for again next time)
+        log(f"PubMed unavailable for {doi}: {error}")
+        metrics.count('pubmed.unavailable')
+        return {}
+    cache.put_pubmed(doi, enrichment)
+    return enrichment
+
+def needs_enrichment(message):
+    return not message.get('title') or not message.get('author') or publication_year(message) is None
 
 def make_paper_from_query(query):
     message = query['message']
     doi = message['DOI']
-    if '.org/' in doi:
-        pmiddoi = doi.rpartition('.org/')[-1]
+    if needs_enrichment(message):
+        article = pubmed_enrichment(doi)
     else:
-        pmiddoi = doi
-    pmid = fetch.pmids_for_query(pmiddoi)
-    article = fetch.article_by_pmid(pmid)
-    title = message['title']
-    if title == None:
-        try:
-            title = article.title
-        except:
-            pass
-    author = message['author']
-    if author == None:
-        author = article.authors
-        author = article.authors[0]
+        metrics.count('pubmed.skipped')
+        article = {}
+    title = message.get('title')
+    if not title:
+        title = [article['title']] if article.get('title') else None
+    author = message.get('author')
+    if not author and article.get('authors'):
+        author = article['authors'][0]
         author = author.rpartition(" ")[0]        
     date_time = message['created']['date-time']
-    if article.year:
-        year = article.year
+    if article.get('year'):
+        year = article['year']
     else: 
-        year = datetime.fromisoformat(date_time).year
+        year = publication_year(message) or datetime.fromisoformat(date_time).year
     references = message['reference'] if message['references-count'] > 0 else None
-    return Paper(DOI=doi,
-                 title=title,
-                 author=author,
-                 year=year,
-                 references=references)
-
-def query_from_DOI(doi): 
-    cr = Crossref()
+    paper = Paper(DOI=doi,
+                  title=title,
+                  author=author,
+                  year=year,
+                  references=references)
+    get_titles().add_paper(paper)
+    return paper
+
+def query_from_DOI(doi, speculative = False): 
+    """Crossref work for doi, None if there is none; raises Http.TransientError if Crossref is not answering.
+    A speculative request (a prefetch) waits for spare capacity and raises Http.BusyError if none comes."""
+    from Http import PermanentError
+    cache = get_cache()
+    aliases = get_aliases()
+    doi = aliases.resolve(doi)
+    query = cache.get_crossref(doi)
+    if query:
+        log(f"Found paper in cache: {doi}")
+        return query
+    if cache.is_cache_only():
+        log(f"Not in cache, skipping {doi}")
+        return None
+
+    url = f"{CROSSREF_URL.rstrip('/')}/works/{quote(canonical_doi(doi) or doi, safe='/')}"
     try: 
-        query = cr.works(doi)
-    except: 
-        print(f"Failed to pull DOI {doi}")
+        query = get_crossref_client().get(url, speculative=speculative).json()
+    except (PermanentError, ValueError) as error: 
+        log(f"Failed to pull DOI {doi}: {error}")
+        metrics.count('fetch.failed')
         return None
     
-    if query['message-type'] == 'work': 
-        print(f"Found paper: {doi}")
+    if query.get('message-type') == 'work': 
+        log(f"Found paper: {doi}")
+        aliases.add(doi, query['message']['DOI'])
+        cache.put_crossref(query['message']['DOI'], query)
         return query
     
-    print(f"Unable to pull {doi}")
+    log(f"Unable to pull {doi}")
+    metrics.count('fetch.failed')
     return None
 
-def make_dagnode_from_paper(paper_name, score : float = None, depth : float = None):
-    dagnode = DAGNode(paper_name, score, depth)
-    return(dagnode)
-
-def get_dagnode(paper: Paper):
-    id = paper.make_name()
-    return(tuple(id, ))
+def query_bibliographic(text, rows = TITLE_LOOKUP_ROWS):
+    """Crossref's best matches for a citation as (DOI, title, first author, year), None if Crossref is not answering"""
+    from Http import PermanentError, TransientError
+    url = f"{CROSSREF_URL.rstrip('/')}/works"
+    params = {'query.bibliographic': text, 'rows': rows,
+              'select': 'DOI,title,author,issued,published-print,published-online'}
+    try:
+        items = get_crossref_client().get(url, params=params).json()['message']['items']
+    except TransientError as error:
+        log(f"Crossref unavailable, not looking up {text}: {error}")
+        return None
+    except (PermanentError, ValueError, KeyError, TypeError) as error:
+        log(f"Failed to look up {text}: {error}")
+        return []
+    candidates = []
+    for item in items:
+        title = item.get('title')
+        authors = [author.get('family') for author in item.get('author') or [] if isinstance(author, dict)]
+        candidates.append((item.get('DOI'), title[0] if isinstance(title, list) and title else title,
+                           authors[0] if authors else None, publication_year(item)))
+    return candidates
+
+def cached_work(doi):
+    """Crossref work for doi from the metadata cache alone, None if it is not there"""
+    query = get_cache().get_crossref(get_aliases().resolve(doi))
+    return query.get('message') if query else None
+
+def fetch_paper(doi, speculative = False):
+    query = query_from_DOI(doi, speculative=speculative)
+    if not query:
+        return None
+    return make_paper_from_query(query)
 
-def surf(current_paper, starting_papers, seen_DOIs, seen_papers, keywords, important_authors, cr, back_to_start_weight=0.15):
-    
-    if seen_papers:
-        papers = seen_papers.union(starting_papers)
-    else:
-        papers = starting_papers
-        
+def surf(current_paper, starting_papers, seen_papers, matcher, decisions, cr, back_to_start_weight=0.15,
+         rng=default_rng, prefetcher=None, backend=None, triage=None, titles=None, papers=None):
     if not current_paper.get_references(): 
-        print(f"Current paper does not have references on system: {current_paper.get_title()}")
-        return SurfWrapper(choice(list(papers)), 
+        log(f"Current paper does not have references on system: {current_paper.get_title()}")
+        return SurfWrapper(choice_from(rng, starting_papers, seen_papers), 
                            action=InvalidReferences())
     
-    if random() < back_to_start_weight: 
-        return SurfWrapper(choice(list(starting_papers)),
+    if rng.random() < back_to_start_weight: 
+        return SurfWrapper(starting_papers.choice(rng),
                            action=BackToStart())
     
     for _ in range(10): 
-        random_reference = choice(current_paper.get_references())
+        #Triage picks by inline metadata, so hopeless references are rarely fetched at all
+        if triage:
+            random_reference = triage.choose(current_paper, rng)
+            if random_reference is None:
+                break
+        else:
+            random_reference = rng.choice(current_paper.get_references())
 
         # if we have already seen paper, don't download again
 
-        doi = random_reference.get_DOI()
+        metrics.count('surf.attempts')
+        doi = get_aliases().resolve(random_reference.get_DOI())
+        #Older papers often cite without a DOI, but the title usually still identifies the work
+        if not doi and titles is not None and titles.can_resolve(random_reference):
+            doi = get_aliases().resolve(titles.resolve(random_reference))
         if not doi: 
+            metrics.count('references.no_doi')
             if not random_reference.get_title(): 
-                print("Empty paper title and empty DOI")
+                log("Empty paper title and empty DOI")
             else:
-                print(f"No DOI for {random_reference.get_title()} found")
+                log(f"No DOI for {random_reference.get_title()} found")
             continue
         
-        if doi not in seen_DOIs:
-            try: 
-                query = query_from_DOI(doi)
-            except: 
-                print(f"Unable to get query for: {random_reference.get_title()}")
-                continue
-            try:
-                random_paper = make_paper_from_query(query)
-                random_paper_score = random_paper.score_paper(keywords, important_authors)
-
-                if random_paper_score <= 10:
-                    print(f"""
-                    Very low paper score: {random_paper.get_title()} by {random_paper.get_first_author()}, 
-                    Total ={random_paper_score}, 
-                    Title = {random_paper.title_score(keywords)}, 
-                    Author = {random_paper.author_score(important_authors)} 
-                    - likely irrelevent, surf again
-                    """)
-
-                    back_to_start_weight = 0.15
-                    return SurfWrapper(choice(list(papers)), 
-                           action=LowScorePaper())
-        
-                elif 10 < random_paper_score < 20:
-                    print(f"""
-                    Moderate paper score: {random_paper.get_title()} by {random_paper.get_first_author()}, 
-                    Total ={random_paper_score}, 
-                    Title = {random_paper.title_score(keywords)}, 
-                    Author = {random_paper.author_score(important_authors)} 
-                    - may be relevant, accept paper but increase BTS 
-                    """)
-                    
-                    back_to_start_weight = 0.8
-                    return SurfWrapper(random_paper, 
-                                        action=NewPaper())
-                
-                elif random_paper_score > 40:
-                    print(f"""
-                    Excellent paper score: {random_paper.get_title()} by {random_paper.get_first_author()}, 
-                    Total ={random_paper_score}, 
-                    Title = {random_paper.title_score(keywords)}, 
-                    Author = {random_paper.author_score(important_authors)} 
-                    - highly likely relevant as are subsequent references, reduce BTS
-                    """)
-                    
-                    back_to_start_weight = 0.05
-                    return SurfWrapper(random_paper, 
-                                        action=NewPaper())
-                
-                else:
-                    print(f"""
-                    Good paper score: {random_paper.get_title()} by {random_paper.get_first_author()}, 
-                    Total ={random_paper_score}, 
-                    Title = {random_paper.title_score(keywords)}, 
-                    Author = {random_paper.author_score(important_authors)} 
-                    - likely relevant, continue
-                    """)
-
-                    back_to_start_weight = 0.15
-                    return SurfWrapper(random_paper, 
-                                        action=NewPaper())
+        known_paper = seen_papers.get(doi) or starting_papers.get(doi)
+        if known_paper:
+            log(f"Paper already seen: {random_reference.get_title()}")
+            return SurfWrapper(known_paper, 
+                               action=PreviouslySeenPaper())
 
+        #Each DOI is fetched and scored at most once per run, whichever walker gets to it first
+        decision = decisions.get(doi)
+        if decision and decision.is_failed():
+            log(f"Recently failed to fetch, skipping: {random_reference.get_title()}")
+            metrics.count('decisions.failed_skip')
+            continue
+        metrics.count('decisions.hit' if decision else 'decisions.miss')
+        if not decision:
+            random_paper = prefetcher.get(doi) if prefetcher else None
+            #The service keeps papers fetched by earlier jobs in memory, and the DOIs they failed to fetch
+            if not random_paper and papers is not None:
+                random_paper = papers.get(doi)
+                failure = papers.get_failure(doi) if not random_paper else None
+                if failure:
+                    metrics.count('decisions.failed_skip')
+                    decisions.update([(doi, failure)])
+                    continue
+            #An offline snapshot replaces Crossref and PubMed altogether
+            if backend:
+                with metrics.timer('stage.snapshot'):
+                    random_paper = backend.fetch_paper(doi)
+                if not random_paper:
+                    log(f"Not in snapshot: {doi}")
+                    metrics.count('fetch.failed')
+                    decisions.fail(doi, permanent=True)
+                    continue
+            if not random_paper:
+                from Http import TransientError
+                try: 
+                    query = query_from_DOI(doi)
+                except TransientError as error:
+                    #Crossref trouble says nothing about the paper, so it is not remembered as a failure
+                    log(f"Crossref unavailable, skipping {doi}: {error}")
+                    metrics.count('fetch.transient')
+                    continue
+                except: 
+                    log(f"Unable to get query for: {random_reference.get_title()}")
+                    decisions.fail(doi)
+                    if papers is not None:
+                        papers.fail(doi)
+                    continue
+                #No such work (or not in the cache with --cache-only): no point asking again this run
+                if not query:
+                    decisions.fail(doi, permanent=True)
+                    if papers is not None:
+                        papers.fail(doi, permanent=True)
+                    continue
+            try:
+                if not random_paper:
+                    with metrics.timer('stage.make_paper'):
+                        random_paper = make_paper_from_query(query)
+                    if papers is not None:
+                        papers.add(random_paper)
             except: 
-                print(f"Unable to make paper from query for: {random_reference.get_title()}")
+                log(f"Unable to make paper from query for: {random_reference.get_title()}")
+                decisions.fail(doi)
+                if papers is not None:
+                    papers.fail(doi)
                 continue
-
-        else: 
-            print(f"Paper already seen: {random_reference.get_title()}")
-            random_paper = next(x for x in seen_papers if x.get_DOI() == doi)
+            with metrics.timer('stage.score'):
+                scores = matcher.scores(random_paper)
+            decision = decisions.record(doi, random_paper, scores, accepted=scores[0] > LOW_SCORE)
+
+        random_paper = decision.get_paper()
+        random_paper_score, title_score, author_score = decision.get_scores()
+
+        if decision.is_low_score():
+            log(f"""
+            Very low paper score: {random_paper.get_title()} by {random_paper.get_first_author()}, 
+            Total ={random_paper_score}, 
+            Title = {title_score}, 
+            Author = {author_score} 
+            - likely irrelevent, surf again
+            """)
+
+            back_to_start_weight = 0.15
+            return SurfWrapper(choice_from(rng, starting_papers, seen_papers), 
+                   action=LowScorePaper(), score=random_paper_score, candidate=random_paper)
+
+        elif LOW_SCORE < random_paper_score < 20:
+            log(f"""
+            Moderate paper score: {random_paper.get_title()} by {random_paper.get_first_author()}, 
+            Total ={random_paper_score}, 
+            Title = {title_score}, 
+            Author = {author_score} 
+            - may be relevant, accept paper but increase BTS 
+            """)
+            
+            back_to_start_weight = 0.8
             return SurfWrapper(random_paper, 
-                               action=PreviouslySeenPaper())
+                                action=NewPaper(), score=random_paper_score)
+        
+        elif random_paper_score > 40:
+            log(f"""
+            Excellent paper score: {random_paper.get_title()} by {random_paper.get_first_author()}, 
+            Total ={random_paper_score}, 
+            Title = {title_score}, 
+            Author = {author_score} 
+            - highly likely relevant as are subsequent references, reduce BTS
+            """)
+            
+            back_to_start_weight = 0.05
+            return SurfWrapper(random_paper, 
+                                action=NewPaper(), score=random_paper_score)
+        
+        else:
+            log(f"""
+            Good paper score: {random_paper.get_title()} by {random_paper.get_first_author()}, 
+            Total ={random_paper_score}, 
+            Title = {title_score}, 
+            Author = {author_score} 
+            - likely relevant, continue
+            """)
+
+            back_to_start_weight = 0.15
+            return SurfWrapper(random_paper, 
+                                action=NewPaper(), score=random_paper_score)
       
-    return SurfWrapper(choice(list(papers)), 
+    return SurfWrapper(choice_from(rng, starting_papers, seen_papers), 
                        action=BackToStart())
 
-def main(): 
-    cr = Crossref()
-    STARTING_CORPUS_PATH = 'corpus.csv'
-
-    starting_DOIs = set()
-    seen_DOIs = set()
-
-    with open(STARTING_CORPUS_PATH, 'r') as csvfile:
+def simulate(args, snapshot, starting_papers, walk_result, matcher):
+    """Vectorized walk over the snapshot arrays; fills walk_result and returns the ranking"""
+    from Simulate import BatchSimulator, node_scores
+    with metrics.timer('stage.score'):
+        scores = node_scores(snapshot, matcher)
+    starting_ids = [snapshot.get_id(paper.get_DOI()) for paper in starting_papers]
+    simulator = BatchSimulator(snapshot, scores, starting_ids, back_to_start_weight=0.15, low_score=LOW_SCORE,
+                               n_walkers=args.walkers, seed=args.seed)
+    steps = args.steps if args.stop == 'steps' else args.max_steps
+    with metrics.timer('stage.walk'):
+        simulator.run(steps)
+    print(f"Simulated {args.walkers} walkers for {steps} steps")
+    simulator.fill_result(walk_result, matcher, top=SIM_KEEP)
+    return simulator.get_ranking()
+
+def report_metrics(path = METRICS_PATH):
+    metrics.stop_export()
+    if path:
+        metrics.write(path)
+    print(metrics.summary())
+
+def parse_args(argv = None):
+    parser = argparse.ArgumentParser(description='Surf the citation graph out from a starting corpus')
+    parser.add_argument('--corpus', default=STARTING_CORPUS_PATH, help='CSV of starting papers with a DOI column')
+    parser.add_argument('--keywords', default=KEYWORDS)
+    parser.add_argument('--important-authors', default=IMPORTANT_AUTHORS)
+    parser.add_argument('--abx-colours', default=ABX_COLOURS)
+    parser.add_argument('--stop', choices=('converge', 'steps'),
+                        help=f"'converge' stops once the ranking is stable, 'steps' after --steps (default {STOP}, "
+                             "or steps if --steps is given)")
+    parser.add_argument('--steps', type=int, help=f"steps per walker with --stop steps (default {STEPS_PER_WALKER})")
+    parser.add_argument('--max-steps', type=int, default=MAX_STEPS_PER_WALKER, help="budget per walker with --stop converge")
+    parser.add_argument('--max-seconds', type=float, default=MAX_SECONDS, help="time budget with --stop converge")
+    parser.add_argument('--top-k', type=int, default=CONVERGE_TOP_K)
+    parser.add_argument('--overlap', type=float, default=CONVERGE_OVERLAP, help='top-k overlap that counts as stable')
+    parser.add_argument('--walkers', type=int, default=None, help=f"default {N_WALKERS}")
+    parser.add_argument('--seed', default=SEED, help='makes runs reproducible')
+    parser.add_argument('--ranking', choices=('walk', 'pagerank'), default=RANKING)
+    parser.add_argument('--cache', default=CACHE_PATH, help='metadata cache (SQLite)')
+    parser.add_argument('--snapshot', default=SNAPSHOT_PATH, help='surf offline on a snapshot built by Snapshot.py')
+    parser.add_argument('--engine', choices=('surf', 'vectorized'), default=ENGINE,
+                        help="'vectorized' walks many walkers at once over a --snapshot (--walkers defaults to SIM_WALKERS)")
+    parser.add_argument('--no-triage', dest='triage', action='store_false', default=TRIAGE,
+                        help='pick references uniformly instead of by their inline metadata')
+    parser.add_argument('--cache-only', action='store_true', default=CACHE_ONLY, help='never go to the network')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH)
+    parser.add_argument('--no-resume', dest='resume', action='store_false', default=RESUME)
+    parser.add_argument('--events', default=EVENT_LOG_PATH, help='JSONL log of every surf step')
+    parser.add_argument('--output', default=OUTPUT_PATH, help='ranking CSV')
+    parser.add_argument('--graph', default=GRAPH_PATH, help='DAG saved as JSON for Render.py')
+    parser.add_argument('--render', default=RENDER_PATH, help='image to draw the DAG to')
+    parser.add_argument('--no-render', dest='render', action='store_const', const=None)
+    parser.add_argument('--metrics', default=METRICS_PATH, help='JSON snapshot of timings and counters')
+    args = parser.parse_args(argv)
+    if args.engine == 'vectorized' and not args.snapshot:
+        parser.error('--engine vectorized needs --snapshot')
+    if args.engine == 'vectorized' and args.ranking == 'pagerank':
+        parser.error('--engine vectorized ranks by visits only')
+    if args.walkers is None:
+        args.walkers = SIM_WALKERS if args.engine == 'vectorized' else N_WALKERS
+    #Asking for a number of steps means walking that many
+    if args.stop is None:
+        args.stop = 'steps' if args.steps is not None else STOP
+    elif args.stop == 'converge' and args.steps is not None:
+        parser.error('--steps only applies to --stop steps; --max-steps bounds --stop converge')
+    if args.steps is None:
+        args.steps = STEPS_PER_WALKER
+    return args
+
+def main(argv = None): 
+    args = parse_args(argv)
+    open_cache(args.cache, cache_only=args.cache_only)
+    #Summary is printed however the run ends, including Ctrl-C
+    atexit.register(report_metrics, args.metrics)
+    #The cache writes access times in batches
+    atexit.register(cache.flush)
+    if args.metrics:
+        metrics.start_export(args.metrics, every=METRICS_EVERY)
+    keywords = read_keywords(args.keywords)
+    important_authors = read_important_authors(args.important_authors)
+
+    #Keep corpus order so that seeded runs are reproducible
+    starting_DOIs = dict()
+
+    with open(args.corpus, 'r') as csvfile:
         reader = csv.DictReader(csvfile)
         for row in reader:
-            doi = row['DOI']
+            doi = aliases.resolve(row['DOI'])
             if doi: 
-                starting_DOIs.add(doi)
-
-    starting_papers = set()
-    seen_papers = set()
-    paper_counter = dict()
-    node_list = set()
-    depth_list = dict()
-    paired_node_list = dict()
+                starting_DOIs[doi] = None
+
+    starting_papers = PaperRegistry()
+    walk_result = WalkResult()
     
     #Colour nodes by antibiotic class
-    ABX_COLOURS = 'antibiotic_colours.csv'
-
-    abx_list = []
-    abx_colours = dict()
-    abx_classes = dict()
-    node_colours = dict()
-
-    with open(ABX_COLOURS, 'r') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            abx = row['abx']
-            colour = row['colour']
-            abxclass = row['class']
-            abx_colours[abx] = colour
-            abx_classes[abx] = abxclass
-            abx_list.append(abx)
+    abx_list, abx_colours = read_abx_colours(args.abx_colours)
 
     #Add starting corpus as papers, DAG nodes (of depth 0) and calculate scores
-    for i in starting_DOIs:
-        result = query_from_DOI(i)
-        paper = make_paper_from_query(result)
+    snapshot = None
+    with metrics.timer('stage.resolve_corpus'):
+        if args.snapshot:
+            from Snapshot import SnapshotGraph
+            #Works imported from citation dumps alone get their titles from earlier online runs, if any
+            snapshot = SnapshotGraph(args.snapshot, lookup=cached_work)
+            print(f"Surfing offline on {args.snapshot} ({len(snapshot)} papers)")
+            resolved = [paper for paper in map(snapshot.fetch_paper, starting_DOIs) if paper]
+        else:
+            from Resolver import CorpusResolver
+            resolver = CorpusResolver(query_from_DOI, make_paper_from_query, max_in_flight=MAX_IN_FLIGHT, log=log)
+            resolved = resolver.resolve(starting_DOIs)
+    #Walkers need at least one starting paper to start from and jump back to
+    if not resolved:
+        if not starting_DOIs:
+            cause = "it has no valid DOIs"
+        elif args.snapshot:
+            cause = f"none of its {len(starting_DOIs)} DOIs is in {args.snapshot} with metadata or references"
+        elif args.cache_only:
+            cause = f"none of its {len(starting_DOIs)} DOIs is in the cache {args.cache} (--cache-only)"
+        else:
+            cause = f"none of its {len(starting_DOIs)} DOIs could be pulled from Crossref (see above)"
+        sys.exit(f"No starting papers in {args.corpus}: {cause}")
+    for paper in resolved:
         starting_papers.add(paper)
-        paper_name = paper.make_name()
-        dag_node = make_dagnode_from_paper(paper_name)
-        dag_node.set_depth(0)
-        node_list.add(dag_node)
-        depth_list[paper_name] = dag_node.get_depth()
         try:
             first_author = paper.get_first_author()
             first_author = unidecode(first_author)
@@ -278,77 +686,67 @@ def main():
                 important_authors.append(last_author)
         except:
             pass 
-        try: 
-            title = paper.get_title()
-            title = unidecode(title)
-            title = title.lower()
-            node_colours[paper_name] = []
-            for ab in abx_list:
-                if ab in title:
-                   node_colours[paper_name].append(abx_colours[ab])           
-        except:
-            pass
 
-    #Start surfing
-    paper_pointer = choice(list(starting_papers))
-    for _ in range(10): 
-        print(f"iteration {_}")
-        new_wrapped_paper = surf(paper_pointer, starting_papers, seen_DOIs, seen_papers, keywords, important_authors, cr=cr,
-                                 back_to_start_weight=0.15)
-        new_paper = new_wrapped_paper.get_paper()
-        #new_paper_score = new_paper.score_paper(keywords, important_authors)
-        new_paper_name = new_paper.make_name()
-        new_node = make_dagnode_from_paper(new_paper_name)
-
-        if new_node not in node_list:
-            node_list.add(new_node)
-
-        #If current paper has been arrived at from another paper without jumping - set parent and increase depth
-        if not new_wrapped_paper.is_back_to_start(): 
-            parent_name = paper_pointer.make_name()
-            new_node.set_parent(parent_name)
-            parent_depth = depth_list[parent_name]
-            new_depth = parent_depth + 1
-            new_node.set_depth(new_depth)
-            new_node_depth = new_node.get_depth()
-            depth_list[new_paper_name] = new_node_depth
-            new_edge = new_node.make_scoreless_edge()
-            if new_paper_name not in paired_node_list:
-                paired_node_list[new_paper_name] = []
-                paired_node_list[new_paper_name].append(new_edge)
-            else:
-                if new_edge not in paired_node_list[new_paper_name]:
-                    paired_node_list[new_paper_name].append(new_edge)
-                else:
-                    pass
-        
-        #Assign a colour
-        new_paper_title = new_paper.get_title()
-        if new_paper_name not in node_colours:
-            node_colours[new_paper_name] = []
-            for ab in abx_list:
-                if ab in new_paper_title:
-                    node_colours[new_paper_name].append(abx_colours[ab])
+    #Authors of the starting corpus count as important, so the matcher is compiled once they are known
+    matcher = PaperMatcher(keywords, important_authors, abx_list, abx_colours, score_authors=SCORE_AUTHORS)
+    for paper, (_, _, _, colours) in zip(starting_papers, matcher.match_many(starting_papers)):
+        walk_result.graph.add_node(paper.make_name(), colours, start=True)
+
+    if args.engine == 'vectorized':
+        ranking = simulate(args, snapshot, starting_papers, walk_result, matcher)
+    else:
+        #Start surfing
+        decisions = DecisionCache(failure_ttl=FAILED_FETCH_TTL)
+        #Snapshots list DOI-less references without any metadata to match them by
+        reference_titles = None if snapshot else titles
+        triage = None
+        if args.triage:
+            from Triage import ReferenceTriage
+            triage = ReferenceTriage(matcher, low_score=LOW_SCORE, promising_weight=TRIAGE_PROMISING_WEIGHT,
+                                     irrelevant_weight=TRIAGE_IRRELEVANT_WEIGHT, titles=reference_titles)
+        walk_surf = partial(surf, matcher=matcher, decisions=decisions, cr=None,
+                            back_to_start_weight=0.15, backend=snapshot, triage=triage, titles=reference_titles)
+        make_prefetcher = None
+        if PREFETCH_WORKERS and not snapshot:
+            make_prefetcher = partial(Prefetcher, fetch_paper, max_workers=PREFETCH_WORKERS, max_queued=PREFETCH_QUEUE,
+                                      order=triage.ranked_DOIs if triage else None, decided=decisions.get)
+        event_log = SurfEventLog(args.events, output_path=args.output, flush_every=RANKING_FLUSH_EVERY)
+        pool = WalkerPool(walk_surf, starting_papers, matcher,
+                          n_walkers=args.walkers, seed=args.seed, make_prefetcher=make_prefetcher, sink=event_log,
+                          verbose=VERBOSE)
+        checkpointer = Checkpointer(args.checkpoint, every=CHECKPOINT_EVERY,
+                                    key=(WalkResult.VERSION, tuple(starting_DOIs), args.walkers, args.seed, args.ranking,
+                                         args.triage, args.stop, args.steps if args.stop == 'steps' else args.max_steps,
+                                         inputs_digest(args.keywords, args.important_authors, args.abx_colours)))
+        if args.resume:
+            state = pool.resume(checkpointer)
+            if state:
+                decisions.update(state['extra'])
+                event_log.resume(pool.get_counts())
+        steps, monitor = args.steps, None
+        if args.stop == 'converge':
+            steps = args.max_steps
+            monitor = ConvergenceMonitor(every=CONVERGE_EVERY, top_k=args.top_k, overlap=args.overlap,
+                                         discovery=CONVERGE_DISCOVERY, patience=CONVERGE_PATIENCE,
+                                         max_seconds=args.max_seconds)
+        try:
+            with metrics.timer('stage.walk'):
+                pool.run(steps, result=walk_result, checkpointer=checkpointer, extra_state=decisions.items,
+                         monitor=monitor)
+            #A finished walk is not resumed; the next run starts afresh
+            checkpointer.remove()
+        finally:
+            event_log.close()
+        if args.ranking == 'pagerank':
+            from Rank import personalized_pagerank
+            fetched_papers = {doi: (decision.get_paper(), decision.is_accepted())
+                              for doi, decision in decisions.items() if not decision.is_failed()}
+            ranking = personalized_pagerank(starting_papers, fetched_papers, back_to_start_weight=0.15,
+                                            resolve=aliases.resolve, steps=pool.get_steps(),
+                                            weigh=triage.weights if triage else None)
         else:
-            for ab in abx_list:
-                if ab in new_paper_title:
-                    node_colours[new_paper_name].append(abx_colours[ab])
-        
-        #Keep track of how many times we have seen this paper
-        if new_paper not in starting_papers: 
-            if new_paper not in seen_papers: 
-                paper_counter[new_paper] = 1
-                seen_DOIs.add(new_paper.get_DOI())
-                seen_papers.add(new_paper)
-            else: 
-                paper_counter[new_paper] += 1
-     
-        if new_paper.get_references(): 
-            paper_pointer = new_paper
-        elif seen_papers: 
-            paper_pointer = choice(list(seen_papers))
-        else: 
-            paper_pointer = choice(list(starting_papers))
+            ranking = walk_result.paper_counter
+    paper_counter = walk_result.paper_counter
 
     #Print our list of papers and how many times we have seen them, in order of frequency   
     sorted_paper_counter = sorted(paper_counter.items(), key=lambda item: item[1], reverse=True)
@@ -356,122 +754,19 @@ def main():
     for i,j in sorted_paper_counter: 
         print(f"Paper {i.make_name()} {i.get_title()} DOI {i.get_DOI()} seen {j} times")
 
-    #Make pairs for DAG edges
-    concat_paired_nodes = []
-    for paper_name in paired_node_list:
-        for pair in paired_node_list[paper_name]:
-            concat_paired_nodes.append(pair)
-    
-    #Make labels for DAG nodes - label all initial papers
-    labelled_list = [] 
-    labels = {}
-    node_name_list = []
-    for paper in starting_papers:
-        papername = paper.make_name() 
-        labelled_list.append(papername)
-    print(f"labelled starting {labelled_list}")
-    for node in node_list:
-        name = node.get_name() 
-        node_name_list.append(name)
-    
-    #Calculate scores for DAG node size
-    freq_list = {}
-    score_list = {}
-    for paper, frequency in paper_counter.items():
-        id = paper.make_name()
-        freq_list[id] = frequency
-    for pap_name in node_name_list:
-        if pap_name in freq_list:
-            freq_score = freq_list[pap_name]
-        else:
-            freq_score = 1
-        if pap_name in depth_list and depth_list[pap_name] != None: 
-            depth_score = depth_list[pap_name]
-            depth_score = depth_score * 3
-        else:
-            depth_score = 0
-        score = (freq_score + depth_score)
-        score_list[pap_name] =  score
-
-    #Colour DAG nodes according to antibiotic
-    colour_list = dict()
-    for paper_name in node_colours:
-        collist = []
-        for col in node_colours[paper_name]:
-            collist.append(col)
-        if len(collist) == 0:
-            colour_list[paper_name] = '#ADACAC'
-        elif len(collist) == 1:
-            colour_list[paper_name] = collist[0]
-        else:
-            colset = set(node_colours[paper_name])
-            if len(collist) != len(colset):
-               colsetlist = list(colset)
-               if len(colsetlist) > 1:
-                    colour_list[paper_name] = '#D8C292'
-               else:
-                    colour_list[paper_name] = colsetlist[0]
-
-    for paper_name in node_name_list:
-        if paper_name not in colour_list.keys():
-            colour_list[paper_name] = '#ADACAC'
-
-    #Make starting papers look different
-    alpha_list = dict()
-    line_width_list = {}
-    for paper in starting_papers:
-        name = paper.make_name()
-        alpha_list[name] = 0.7
-        line_width_list[name] = 7
-    for paper_name in node_name_list:
-        if paper_name not in alpha_list:
-            alpha_list[paper_name] = 0.9
-        if paper_name not in line_width_list:
-            line_width_list[paper_name] = 2
-
-    #Add elements to the the DAG
-    DAG = nx.MultiDiGraph()
-    DAG.add_nodes_from(node_name_list)
-    nx.set_node_attributes(DAG, score_list, 'size')
-    nx.set_node_attributes(DAG, colour_list, 'color')
-    nx.set_node_attributes(DAG, alpha_list, 'alpha')
-    nx.set_node_attributes(DAG, line_width_list, 'line_width')
-    nx.set_node_attributes(DAG, node_name_list, 'name')
-    DAG.add_edges_from(concat_paired_nodes)
-    
-    #Adjust score list to create DAG node sizes
-    for i in score_list:
-        score_list[i] *= 20
-        #n = float(DAG.number_of_nodes())
-        #score_list[i] += ((300/n)*100)
-
-    #Draw DAG    
-    pos= nx.nx_agraph.graphviz_layout(DAG, prog = "dot")
-    nx.draw_networkx_nodes(DAG, pos, 
-                           node_size=[score_list[n] for n in DAG.nodes()], 
-                           node_color=[colour_list[n] for n in DAG.nodes()], 
-                           alpha=[alpha_list[n] for n in DAG.nodes()], 
-                           linewidths=[line_width_list[n] for n in DAG.nodes()])
-    nx.draw_networkx_edges(DAG, pos, alpha=0.4, arrowstyle='<|-')
-    
+    #The walk graph already carries node sizes, colours, depths and edge multiplicities
+    DAG = walk_result.graph.to_networkx()
+
     #Pring nodes with highest incoming edges (i.e. most referenced)
-    in_values = dict()
-    top_cited = dict()
-    for n in DAG.nodes:
-        in_value = DAG.out_degree(n)
-        in_values[n] = f"{in_value}"
-    top_cited = sorted(in_values.items(), key=lambda item: item[1], reverse=True)[:10]
+    top_cited = sorted(DAG.out_degree, key=lambda item: item[1], reverse=True)[:10]
     print(f"TOP CITED:")
-    for key,value in sorted(top_cited, key=lambda item: item[1], reverse=True):
+    for key,value in top_cited:
          print(f"Paper {key} cited {value} times")   
 
-    #Make more labels for DAG Nodes - label all highly cited papers
-    
-    for n in DAG.nodes:
-        citedness = DAG.out_degree(n)
-        if citedness >= 3:
-            if n not in labelled_list:
-                labelled_list.append(n)
+    #Make labels for DAG nodes - label all initial papers and all highly cited papers
+    labelled_list = [paper.make_name() for paper in starting_papers]
+    print(f"labelled starting {labelled_list}")
+    labelled_list += [n for n, citedness in DAG.out_degree if citedness >= 3 and n not in labelled_list]
     
     #ALTERNATIVE TO DECIDING TOP SITED FOR LABELLING#
     """
@@ -480,22 +775,17 @@ def main():
             labelled_list.append(n)
     """
     for name in labelled_list:
-            labels[name] = f"{name}" 
-
-    nx.draw_networkx_labels(DAG, pos = nx.nx_agraph.graphviz_layout(DAG, prog = "dot"), 
-                            labels = {n:lab for n,lab in labels.items() if n in pos}, 
-                            font_size=6, font_weight='bold', font_family='sans-serif', 
-                            horizontalalignment = 'center', verticalalignment = 'center')
-
-    with open('output.csv', 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile, delimiter=",")
-        writer.writerow(['DOI', 'author', 'title', 'times_seen'])
-        for paper,times_seen in paper_counter.items(): 
-            writer.writerow([paper.get_DOI(), 
-                             paper.get_title(), 
-                             paper.get_first_author(),
-                             times_seen])
-    
-    plt.show()
+        if name in DAG:
+            DAG.nodes[name]['label'] = f"{name}"
+
+    write_output(args.output, ranking)
+
+    #Draw DAG
+    from Render import save_graph, render
+    save_graph(DAG, args.graph)
+    if args.render:
+        with metrics.timer('stage.render'):
+            render(DAG, args.render, max_nodes=MAX_RENDER_NODES, prune_large=PRUNE_RENDER, cache_dir=LAYOUT_CACHE_DIR)
 
-main()
+if __name__ == '__main__':
+    main()